@@ -17,6 +17,8 @@ class Argument:
     couple_values_list :
     """
 
+    __slots__ = ("decision", "item", "comparison_list", "couple_values_list")
+
     def __init__(self, boolean_decision, item):
         """Creates a new Argument ."""
         self.decision = boolean_decision
@@ -35,16 +37,10 @@ class Argument:
     def list_supporting_proposal(self, item: Item, preferences: Preferences):
         """Generate a list of premisses which can be used to support an item
         : param item : Item - name of the item
-        : return : list of all premisses PRO (value over 5) an item ( sorted by order of importance
+        : return : list of all premisses PRO (value over 4) an item ( sorted by order of importance
         based on agent ’s preferences )
         """
-        premisses = []
-        for criterion in preferences.get_criterion_name_list():
-            if preferences.get_value(item, criterion) > 4:
-                premisses.append(
-                    CoupleValue(criterion, preferences.get_value(item, criterion))
-                )
-        return premisses
+        return list(preferences.get_premises(item)[0])
 
     def list_attacking_proposal(self, item: Item, preferences: Preferences):
         """Generate a list of premisses which can be used to attack an item
@@ -52,10 +48,4 @@ class Argument:
         : return : list of all premisses CON (value under 5) an item ( sorted by order of importance
         based on preferences )
         """
-        premisses = []
-        for criterion in preferences.criterion_name_list:
-            if preferences.get_criterion_value(item, criterion).value < 5:
-                premisses.append(
-                    CoupleValue(criterion, preferences.get_value(item, criterion))
-                )
-        return premisses
+        return list(preferences.get_premises(item)[1])
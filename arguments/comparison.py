@@ -1,13 +1,39 @@
 class Comparison:
     """Comparison class .
     This class implements a comparison object used in argument object .
+    Comparisons are immutable and hashable .
 
     attr :
     best_criterion_name :
     worst_criterion_name :
     """
 
+    __slots__ = ("best_criterion_name", "worst_criterion_name")
+
     def __init__(self, best_criterion_name, worst_criterion_name):
         """Creates a new comparison ."""
-        self.best_criterion_name = best_criterion_name
-        self.worst_criterion_name = worst_criterion_name
+        object.__setattr__(self, "best_criterion_name", best_criterion_name)
+        object.__setattr__(self, "worst_criterion_name", worst_criterion_name)
+
+    def __setattr__(self, name, value):
+        """Comparisons are immutable ."""
+        raise AttributeError("Comparison objects are immutable")
+
+    def __reduce__(self):
+        """Returns how to pickle the comparison ."""
+        return Comparison, (self.best_criterion_name, self.worst_criterion_name)
+
+    def __deepcopy__(self, memo):
+        """Comparisons are immutable : a copy is the comparison itself ."""
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, Comparison):
+            return NotImplemented
+        return (self.best_criterion_name, self.worst_criterion_name) == (
+            other.best_criterion_name,
+            other.worst_criterion_name,
+        )
+
+    def __hash__(self):
+        return hash((self.best_criterion_name, self.worst_criterion_name))
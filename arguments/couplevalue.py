@@ -6,16 +6,39 @@ from communication.preferences.CriterionName import criterion_name
 class CoupleValue:
     """CoupleValue class .
     This class implements a couple value used in argument object .
+    Couple values are immutable and hashable .
 
     attr :
     criterion_name :
     value :
     """
 
+    __slots__ = ("criterion_name", "value")
+
     def __init__(self, criterion_name, value):
         """Creates a new couple value ."""
-        self.criterion_name = criterion_name
-        self.value = value
+        object.__setattr__(self, "criterion_name", criterion_name)
+        object.__setattr__(self, "value", value)
+
+    def __setattr__(self, name, value):
+        """Couple values are immutable ."""
+        raise AttributeError("CoupleValue objects are immutable")
+
+    def __reduce__(self):
+        """Returns how to pickle the couple value ."""
+        return CoupleValue, (self.criterion_name, self.value)
+
+    def __deepcopy__(self, memo):
+        """Couple values are immutable : a copy is the couple value itself ."""
+        return self
+
+    def __eq__(self, other):
+        if not isinstance(other, CoupleValue):
+            return NotImplemented
+        return (self.criterion_name, self.value) == (other.criterion_name, other.value)
+
+    def __hash__(self):
+        return hash((self.criterion_name, self.value))
 
     # print function
     def __str__(self):
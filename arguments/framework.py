@@ -0,0 +1,248 @@
+""" Abstract argumentation framework: attacks between arguments and extensions """
+
+import numpy as np
+
+BLOCK_WORDS = 32768
+
+
+def _pack(mask):
+    """Returns the bits of a boolean array (or of each row of a 2D boolean array) packed
+    into 64 bit words."""
+    packed = np.packbits(mask, axis=-1, bitorder="little")
+    n_bytes = -(-mask.shape[-1] // 64) * 8
+    padding = [(0, 0)] * (packed.ndim - 1) + [(0, n_bytes - packed.shape[-1])]
+    return np.pad(packed, padding).view(np.uint64)
+
+
+class ArgumentationFramework:
+    """ArgumentationFramework class .
+    This class implements an abstract argumentation framework : a set of arguments and
+    an attack relation between them . The attackers of each argument are stored as a
+    bitset (a row of 64 bit words), so that the extensions are computed with bitwise
+    operations over all the arguments at once .
+
+    attr :
+    arguments : the arguments of the framework
+    attackers : the n x ceil(n / 64) bitsets of the attackers of each argument
+    """
+
+    def __init__(self, arguments, attackers):
+        """Creates a new framework from its arguments and the n x n boolean matrix (or
+        the packed bitsets) of its attacks, attackers[b, a] meaning that a attacks b .
+        """
+        attackers = np.asarray(attackers)
+        self.arguments = list(arguments)
+        self.attackers = attackers if attackers.dtype == np.uint64 else _pack(attackers)
+
+    @classmethod
+    def from_attacks(cls, arguments, attacks):
+        """Creates a new framework from its arguments and a list of attacks .
+        : param attacks : list of (attacker index, attacked index) couples
+        """
+        n = len(arguments)
+        attackers = np.zeros((n, n), dtype=bool)
+        for attacker, attacked in attacks:
+            attackers[attacked, attacker] = True
+        return cls(arguments, attackers)
+
+    @classmethod
+    def from_arguments(cls, arguments, preferences):
+        """Creates the framework of arguments generated during a debate .
+
+        Two arguments conflict if they support two different items, or if one is for
+        and the other against the same item . An argument attacks a conflicting one if
+        its main premise (its first couple value) is on a more important criterion, or
+        on the same criterion with a greater value . An argument without couple value
+        attacks no argument .
+        : param arguments : list of Argument
+        : param preferences : Preferences - gives the importance of the criteria
+        """
+        criterion_name_list = preferences.get_criterion_name_list()
+        ranks = {criterion: rank for rank, criterion in enumerate(criterion_name_list)}
+        item_ids = {}
+        n = len(arguments)
+        decision = np.empty(n, dtype=bool)
+        item = np.empty(n, dtype=np.intp)
+        rank = np.empty(n, dtype=np.intp)
+        value = np.empty(n, dtype=np.float64)
+        for i, argument in enumerate(arguments):
+            decision[i] = argument.decision
+            item[i] = item_ids.setdefault(argument.item, len(item_ids))
+            if argument.couple_values_list:
+                couple_value = argument.couple_values_list[0]
+                rank[i] = ranks.get(couple_value.criterion_name, len(ranks))
+                value[i] = couple_value.value
+            else:
+                rank[i] = len(ranks) + 1
+                value[i] = -np.inf
+
+        # Strength of the main premises: 0 for the strongest, equal for equal premises
+        order = np.lexsort((-value, rank))
+        new_strength = np.ones(n, dtype=bool)
+        sorted_rank = rank[order]
+        sorted_value = value[order]
+        new_strength[1:] = (sorted_rank[1:] != sorted_rank[:-1]) | (
+            sorted_value[1:] != sorted_value[:-1]
+        )
+        strength = np.empty(n, dtype=np.intp)
+        strength[order] = np.cumsum(new_strength) - 1
+
+        # Bitsets of the arguments stronger than each strength, and of the arguments
+        # conflicting with an argument for (decision 1) or against (0) each item
+        strength_members = _bitsets(strength, new_strength.sum(), np.ones(n, bool))
+        stronger = np.zeros_like(strength_members)
+        np.bitwise_or.accumulate(strength_members[:-1], axis=0, out=stronger[1:])
+        pro_items = _bitsets(item, len(item_ids), decision)
+        con_items = _bitsets(item, len(item_ids), ~decision)
+        pro = np.bitwise_or.reduce(pro_items, axis=0)
+        conflicting = np.stack([pro_items, (pro & ~pro_items) | con_items])
+
+        attackers = stronger[strength] & conflicting[decision.astype(np.intp), item]
+        return cls(arguments, attackers)
+
+    def __len__(self):
+        """Returns the number of arguments ."""
+        return len(self.arguments)
+
+    def attacks(self, attacker, attacked):
+        """Returns whether an argument attacks another one, given their indexes ."""
+        word = self.attackers[attacked, attacker // 64]
+        return bool((int(word) >> (attacker % 64)) & 1)
+
+    def get_attackers(self, index):
+        """Returns the indexes of the attackers of an argument ."""
+        bits = np.unpackbits(
+            self.attackers[index].view(np.uint8), bitorder="little", count=len(self)
+        )
+        return np.flatnonzero(bits).tolist()
+
+    def get_grounded_labelling(self):
+        """Returns the grounded labelling of the arguments, as two boolean arrays : the
+        arguments labelled IN (the grounded extension) and the ones labelled OUT (the
+        others are UNDECIDED) .
+
+        An argument is IN once all its attackers are OUT, and OUT once one of its
+        attackers is IN, until nothing changes ."""
+        n = len(self)
+        in_mask = np.zeros(n, dtype=bool)
+        out_mask = np.zeros(n, dtype=bool)
+        undecided = np.arange(n)
+        while len(undecided) > 0:
+            unattacked = ~_intersects(self.attackers, undecided, _pack(~out_mask))
+            if not unattacked.any():
+                break
+            in_mask[undecided[unattacked]] = True
+            attacked = _intersects(self.attackers, undecided, _pack(in_mask))
+            out_mask[undecided[attacked]] = True
+            undecided = undecided[~(unattacked | attacked)]
+        return in_mask, out_mask
+
+    def get_grounded_extension(self):
+        """Returns the arguments of the grounded extension ."""
+        in_mask, _ = self.get_grounded_labelling()
+        return [self.arguments[i] for i in np.flatnonzero(in_mask)]
+
+    def get_preferred_extensions(self):
+        """Returns the preferred extensions (maximal admissible sets of arguments), as
+        lists of arguments .
+
+        Every preferred extension is the grounded extension plus a preferred extension
+        of the undecided arguments, which are searched by backtracking : the search
+        is exponential in the number of undecided arguments (there are none when the
+        attacks have no cycle) ."""
+        in_mask, out_mask = self.get_grounded_labelling()
+        grounded = np.flatnonzero(in_mask).tolist()
+        undecided = np.flatnonzero(~(in_mask | out_mask))
+        if len(undecided) == 0:
+            return [[self.arguments[i] for i in grounded]]
+
+        # Bitsets (python integers) of the attacks between the undecided arguments
+        n = len(self)
+        rows = np.unpackbits(
+            self.attackers[undecided].view(np.uint8),
+            axis=1,
+            bitorder="little",
+            count=n,
+        )[:, undecided].astype(bool)
+        attackers = [_to_bitset(row) for row in rows]
+        attacked = [_to_bitset(column) for column in rows.T]
+
+        extensions = []
+        for extension in _maximal_admissible_sets(attackers, attacked):
+            indexes = sorted(
+                grounded
+                + [undecided[i] for i in range(len(undecided)) if extension >> i & 1]
+            )
+            extensions.append([self.arguments[i] for i in indexes])
+        return extensions
+
+
+def _intersects(bitsets, rows, bitset):
+    """Returns whether each of the given rows of bitsets intersects a bitset, working
+    on blocks of rows small enough to stay in the processor cache."""
+    result = np.empty(len(rows), dtype=bool)
+    block_size = max(1, BLOCK_WORDS // max(1, bitsets.shape[1]))
+    for start in range(0, len(rows), block_size):
+        block = bitsets[rows[start : start + block_size]]
+        np.any(block & bitset, axis=1, out=result[start : start + block_size])
+    return result
+
+
+def _bitsets(groups, n_groups, members):
+    """Returns the n_groups bitsets of the member arguments of each group."""
+    n = len(groups)
+    indexes = np.flatnonzero(members)
+    bitsets = np.zeros((n_groups, -(-n // 64)), dtype=np.uint64)
+    np.bitwise_or.at(
+        bitsets,
+        (groups[indexes], indexes // 64),
+        np.left_shift(np.uint64(1), (indexes % 64).astype(np.uint64)),
+    )
+    return bitsets
+
+
+def _to_bitset(mask):
+    """Returns the python integer whose bits are set at the true positions of a mask."""
+    bitset = 0
+    for i in np.flatnonzero(mask).tolist():
+        bitset |= 1 << i
+    return bitset
+
+
+def _maximal_admissible_sets(attackers, attacked):
+    """Returns the maximal admissible sets (as bitsets) of a framework given, for each
+    argument, the bitsets of its attackers and of the arguments it attacks."""
+    n = len(attackers)
+    # Arguments attacked by the arguments from i onwards, to prune the search
+    attacked_from = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        attacked_from[i] = attacked_from[i + 1] | attacked[i]
+
+    admissible_sets = []
+
+    def search(i, members, members_attackers, members_attacked):
+        # Attackers of the members which cannot be attacked back any more
+        if members_attackers & ~(members_attacked | attacked_from[i]):
+            return
+        if i == n:
+            if not members_attackers & ~members_attacked:
+                admissible_sets.append(members)
+            return
+        bit = 1 << i
+        if not (attackers[i] | attacked[i]) & (members | bit):
+            search(
+                i + 1,
+                members | bit,
+                members_attackers | attackers[i],
+                members_attacked | attacked[i],
+            )
+        search(i + 1, members, members_attackers, members_attacked)
+
+    search(0, 0, 0, 0)
+    return [
+        members
+        for members in admissible_sets
+        if not any(
+            other != members and other & members == members for other in admissible_sets
+        )
+    ]
@@ -0,0 +1,105 @@
+""" Memory benchmark: bytes per message and per catalog cell, before and after the
+slotted object model and the preference matrix.
+
+Run with: python -m benchmarks.memory
+"""
+
+import tracemalloc
+
+from communication.message.Message import Message
+from communication.message.MessagePerformative import MessagePerformative
+from communication.preferences.CriterionValue import CriterionValue
+from communication.preferences.Item import Item
+from communication.preferences.Preferences import Preferences
+
+N_MESSAGES = 100000
+N_ITEMS = 20000
+N_CRITERIA = 6
+
+
+class LegacyMessage:
+    """Message with a per-instance __dict__, as before the slotted object model."""
+
+    def __init__(self, from_agent, to_agent, message_performative, content):
+        self.__from_agent = from_agent
+        self.__to_agent = to_agent
+        self.__message_performative = message_performative
+        self.__content = content
+
+
+class LegacyCriterionValue:
+    """CriterionValue with a per-instance __dict__, as before the slotted object model."""
+
+    def __init__(self, item, criterion_name, value):
+        self.__item = item
+        self.__criterion_name = criterion_name
+        self.__value = value
+
+
+def measure(build):
+    """Return the number of bytes allocated (and still alive) by build()."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def bytes_per_message(message_class):
+    """Return the bytes per message kept in a list."""
+    content = Item("Glock 17", "")
+    return (
+        measure(
+            lambda: [
+                message_class("A", "B", MessagePerformative.PROPOSE, content)
+                for _ in range(N_MESSAGES)
+            ]
+        )
+        / N_MESSAGES
+    )
+
+
+def bytes_per_cell_objects(items, criterion_value_class):
+    """Return the bytes per catalog cell stored as one object per cell."""
+    return measure(
+        lambda: [
+            criterion_value_class(item, criterion, 5)
+            for item in items
+            for criterion in range(N_CRITERIA)
+        ]
+    ) / (len(items) * N_CRITERIA)
+
+
+def bytes_per_cell_matrix(items):
+    """Return the bytes per catalog cell stored in the preference matrix."""
+
+    def build():
+        preferences = Preferences()
+        preferences.add_criterion_values(
+            items, list(range(N_CRITERIA)), [[5] * N_CRITERIA] * len(items)
+        )
+        return preferences
+
+    return measure(build) / (len(items) * N_CRITERIA)
+
+
+if __name__ == "__main__":
+    catalog = [Item(f"item {i}", "") for i in range(N_ITEMS)]
+    print(f"{'':<34}{'before':>10}{'after':>10}")
+    print(
+        f"{'bytes per message':<34}"
+        f"{bytes_per_message(LegacyMessage):>10.1f}"
+        f"{bytes_per_message(Message):>10.1f}"
+    )
+    print(
+        f"{'bytes per catalog cell (objects)':<34}"
+        f"{bytes_per_cell_objects(catalog, LegacyCriterionValue):>10.1f}"
+        f"{bytes_per_cell_objects(catalog, CriterionValue):>10.1f}"
+    )
+    print(
+        f"{'bytes per catalog cell (matrix)':<34}"
+        f"{bytes_per_cell_objects(catalog, LegacyCriterionValue):>10.1f}"
+        f"{bytes_per_cell_matrix(catalog):>10.1f}"
+    )
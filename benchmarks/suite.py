@@ -0,0 +1,279 @@
+""" Timing benchmarks of preferences, messaging and full debates, on synthetic catalogs
+and agent populations of increasing size.
+
+Run with: python -m benchmarks.suite [--quick] [--output FILE] [--compare FILE]
+
+The results are written as JSON so that two runs can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+
+import numpy as np
+from mesa import Model
+from mesa.time import BaseScheduler, RandomActivation
+
+from arguments.couplevalue import CoupleValue
+from communication.agent.CommunicatingAgent import CommunicatingAgent
+from communication.agent.MessageActivation import MessageActivation
+from communication.mailbox.Mailbox import Mailbox
+from communication.message.Message import Message
+from communication.message.MessagePerformative import MessagePerformative
+from communication.message.MessageService import MessageService
+from communication.preferences.CatalogGenerator import write_catalog
+from communication.preferences.Item import Item
+from communication.preferences.Preferences import Preferences
+from debate.events import NullEventSink
+from debate.model import ArgumentModel
+
+ITEM_SIZES = [100, 1000, 10000, 100000]
+CRITERIA_SIZES = [6, 24, 96]
+AGENT_SIZES = [10, 100, 1000]
+MESSAGE_SIZES = [1000, 10000, 100000]
+QUICK_ITEM_SIZES = [100, 1000]
+QUICK_CRITERIA_SIZES = [6, 24]
+QUICK_AGENT_SIZES = [10, 100]
+QUICK_MESSAGE_SIZES = [1000, 10000]
+N_DEBATES = 20
+ACTIVE_AGENTS = 10
+
+
+def measure(function, number=1, repeat=5):
+    """Return the best time of `repeat` runs of `number` calls of function, per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def make_preferences(n_items, n_criteria, seed=0):
+    """Return preferences over a synthetic catalog of values from 1 to 10, and its items."""
+    rng = np.random.default_rng(seed)
+    items = [Item(f"item {i}", "synthetic") for i in range(n_items)]
+    preferences = Preferences()
+    preferences.add_criterion_values(
+        items, list(range(n_criteria)), rng.integers(1, 11, (n_items, n_criteria))
+    )
+    preferences.set_criterion_name_list(list(range(n_criteria)))
+    return preferences, items
+
+
+class _BenchAgent(CommunicatingAgent):
+    """Communicating agent doing nothing but receiving and reading messages."""
+
+    def step(self):
+        self.get_new_messages()
+
+
+class _BenchModel(Model):
+    """Model holding a population of communicating agents."""
+
+    def __init__(self, n_agents, scheduler=BaseScheduler):
+        super().__init__()
+        self.schedule = scheduler(self)
+        self.message_service = MessageService(self.schedule, instant_delivery=False)
+        for i in range(n_agents):
+            self.schedule.add(_BenchAgent(i, self, f"agent {i}"))
+
+
+def bench_preferences(results, item_sizes, criteria_sizes):
+    """Time value lookups, scores and top 10% checks."""
+    for n_items in item_sizes:
+        for n_criteria in criteria_sizes:
+            preferences, items = make_preferences(n_items, n_criteria)
+            rng = np.random.default_rng(1)
+            sample = [items[i] for i in rng.integers(0, n_items, 1000)]
+            params = {"items": n_items, "criteria": n_criteria}
+
+            def get_values():
+                for item in sample:
+                    preferences.get_value(item, 0)
+
+            def get_scores():
+                for item in sample[:100]:
+                    item.get_score(preferences)
+
+            def top_10_percent():
+                for item in sample:
+                    preferences.is_item_among_top_10_percent(item)
+
+            # A new percent at each call, so that the cutoff is not already cached
+            percents = iter(range(10, 100))
+
+            def build_top_cutoff():
+                preferences.is_item_among_top_percent(items[0], next(percents))
+
+            results.append(record("get_value", params, measure(get_values) / 1000))
+            results.append(record("Item.get_score", params, measure(get_scores) / 100))
+            results.append(
+                record("top_10_percent", params, measure(top_10_percent) / 1000)
+            )
+            results.append(
+                record("build_top_cutoff", params, measure(build_top_cutoff))
+            )
+
+
+def bench_debates(results, item_sizes):
+    """Time counter proposals and full debates on synthetic catalogs."""
+    with tempfile.TemporaryDirectory() as directory:
+        for n_items in item_sizes:
+            path = os.path.join(directory, f"catalog_{n_items}.csv")
+            write_catalog(path, n_items)
+            params = {"items": n_items}
+            model = ArgumentModel(dataset_path=path, event_sink=NullEventSink(), seed=0)
+            proposals = [
+                (model.items[i], CoupleValue(i % 6, 5)) for i in range(0, n_items, 7)
+            ][:100]
+
+            def counter_proposals():
+                for item, couple_value in proposals:
+                    model.counter_proposal(item, couple_value)
+
+            def debates():
+                for seed in range(N_DEBATES):
+                    ArgumentModel(
+                        dataset_path=path, event_sink=NullEventSink(), seed=seed
+                    ).run(20)
+
+            results.append(
+                record(
+                    "counter_proposal",
+                    params,
+                    measure(counter_proposals) / len(proposals),
+                )
+            )
+            results.append(
+                record("debate", params, measure(debates, repeat=3) / N_DEBATES)
+            )
+
+
+def bench_messaging(results, agent_sizes, message_sizes):
+    """Time message dispatching, scheduler steps and mailbox queries."""
+    performatives = list(MessagePerformative)
+    for n_agents in agent_sizes:
+        for scheduler in (RandomActivation, MessageActivation):
+            model = _BenchModel(n_agents, scheduler)
+            params = {
+                "scheduler": scheduler.__name__,
+                "agents": n_agents,
+                "active": ACTIVE_AGENTS,
+            }
+
+            def schedule_step():
+                for i in range(ACTIVE_AGENTS):
+                    model.message_service.send_message(
+                        Message(
+                            "bench",
+                            f"agent {i * 97 % n_agents}",
+                            MessagePerformative.PROPOSE,
+                            i,
+                        )
+                    )
+                model.message_service.dispatch_messages()
+                model.schedule.step()
+
+            results.append(
+                record("schedule_step", params, measure(schedule_step, number=10))
+            )
+
+    for n_agents in agent_sizes:
+        model = _BenchModel(n_agents)
+        for n_messages in message_sizes:
+            params = {"agents": n_agents, "messages": n_messages}
+            messages = [
+                Message(
+                    f"agent {i % n_agents}",
+                    f"agent {(i * 7 + 1) % n_agents}",
+                    performatives[i % len(performatives)],
+                    i,
+                )
+                for i in range(n_messages)
+            ]
+
+            def dispatch():
+                for message in messages:
+                    model.message_service.send_message(message)
+                model.message_service.dispatch_messages()
+
+            results.append(
+                record("dispatch_messages", params, measure(dispatch, repeat=3))
+            )
+
+    for n_messages in message_sizes:
+        params = {"messages": n_messages}
+        mailbox = Mailbox()
+        for i in range(n_messages):
+            mailbox.receive_messages(
+                Message(f"agent {i % 100}", "me", performatives[i % 5], i)
+            )
+
+        def queries():
+            for i in range(100):
+                mailbox.get_messages_from_exp(f"agent {i}")
+                mailbox.has_message_from(MessagePerformative.ACCEPT, f"agent {i}")
+
+        results.append(
+            record("mailbox_queries", params, measure(queries, repeat=3) / 100)
+        )
+
+
+def record(benchmark, params, seconds):
+    """Return a benchmark result and print it."""
+    print(f"{benchmark:<20}{json.dumps(params):<40}{seconds * 1e6:>14.2f} us")
+    return {"benchmark": benchmark, "params": params, "seconds": seconds}
+
+
+def compare(results, previous_path):
+    """Print the ratio between these results and the results of a previous run."""
+    with open(previous_path, encoding="utf-8") as previous_file:
+        previous = {
+            (result["benchmark"], json.dumps(result["params"])): result["seconds"]
+            for result in json.load(previous_file)["results"]
+        }
+    print(f"\nCompared to {previous_path} (> 1 is slower):")
+    for result in results:
+        key = (result["benchmark"], json.dumps(result["params"]))
+        if key in previous:
+            print(f"{key[0]:<20}{key[1]:<40}{result['seconds'] / previous[key]:>14.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="only the small sizes")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="results of a previous run to compare to")
+    arguments = parser.parse_args()
+
+    quick = arguments.quick
+    benchmark_results = []
+    bench_preferences(
+        benchmark_results,
+        QUICK_ITEM_SIZES if quick else ITEM_SIZES,
+        QUICK_CRITERIA_SIZES if quick else CRITERIA_SIZES,
+    )
+    bench_debates(benchmark_results, QUICK_ITEM_SIZES if quick else ITEM_SIZES)
+    bench_messaging(
+        benchmark_results,
+        QUICK_AGENT_SIZES if quick else AGENT_SIZES,
+        QUICK_MESSAGE_SIZES if quick else MESSAGE_SIZES,
+    )
+
+    with open(arguments.output, "w", encoding="utf-8") as output:
+        json.dump(
+            {
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "results": benchmark_results,
+            },
+            output,
+            indent=1,
+        )
+    if arguments.compare:
+        compare(benchmark_results, arguments.compare)
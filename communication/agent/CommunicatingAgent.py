@@ -19,12 +19,21 @@ class CommunicatingAgent(Agent):
         message_service: The message service used to send and receive message (MessageService)
     """
 
-    def __init__(self, unique_id, model, name):
-        """Create a new communicating agent."""
+    def __init__(self, unique_id, model, name, mailbox=None):
+        """Create a new communicating agent (with a default Mailbox unless one is given,
+        e.g. with a retention policy)."""
         super().__init__(unique_id, model)
         self.__name = name
-        self.__mailbox = Mailbox()
-        self.__messages_service = MessageService.get_instance()
+        self.__mailbox = Mailbox() if mailbox is None else mailbox
+        self.__messages_service = getattr(model, "message_service", None)
+        if self.__messages_service is None:
+            self.__messages_service = MessageService.get_instance()
+        self.__messages_service.register_agent(self)
+
+    def remove(self):
+        """Remove the agent from the model and from the message service."""
+        super().remove()
+        self.__messages_service.unregister_agent(self)
 
     def step(self):
         """The step methods of the agent called by the scheduler at each time tick."""
@@ -42,10 +51,18 @@ class CommunicatingAgent(Agent):
         """Send message through the MessageService object."""
         self.__messages_service.send_message(message)
 
+    def has_new_messages(self):
+        """Return whether there are unread messages."""
+        return self.__mailbox.has_new_messages()
+
     def get_new_messages(self):
         """Return all the unread messages."""
         return self.__mailbox.get_new_messages()
 
+    async def wait_new_messages(self):
+        """Wait for unread messages and return them (requires an AsyncMailbox)."""
+        return await self.__mailbox.wait_new_messages()
+
     def get_messages(self):
         """Return all the received messages."""
         return self.__mailbox.get_messages()
@@ -57,3 +74,7 @@ class CommunicatingAgent(Agent):
     def get_messages_from_exp(self, exp):
         """Return a list of messages which have the same sender."""
         return self.__mailbox.get_messages_from_exp(exp)
+
+    def has_message_from(self, performative, exp):
+        """Return whether a message with this performative has been received from this sender."""
+        return self.__mailbox.has_message_from(performative, exp)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+from heapq import heappop, heappush
+
+from mesa.time import BaseScheduler
+
+
+class MessageActivation(BaseScheduler):
+    """MessageActivation class.
+    Scheduler activating at each step only the agents which received messages, in the
+    order they were added (as BaseScheduler does for every agent).
+
+    The message service notifies the scheduler of each delivered message. An agent
+    receiving a message during a step is activated in the same step if it comes after
+    the agent being activated, at the next step otherwise. An agent is activated again
+    only when it receives new messages, so its step should read all of them.
+
+    attr:
+        positions: the position of each agent, in order of addition (dict)
+        agents_by_position: the agent at each position (dict)
+        ready: the heap of the positions of the agents to activate (list)
+        ready_positions: the positions in ready or deferred (set)
+        deferred: the positions to activate at the next step (list)
+        current_position: the position of the agent being activated (None between steps)
+    """
+
+    def __init__(self, model, agents=None):
+        """Create a new MessageActivation scheduler."""
+        self.__positions = {}
+        self.__agents_by_position = {}
+        self.__next_position = 0
+        self.__ready = []
+        self.__ready_positions = set()
+        self.__deferred = []
+        self.__current_position = None
+        super().__init__(model, None)
+        for agent in agents or ():
+            self.add(agent)
+
+    def add(self, agent):
+        """Add an agent to the schedule, ready if it already has unread messages."""
+        super().add(agent)
+        position = self.__next_position
+        self.__next_position += 1
+        self.__positions[agent] = position
+        self.__agents_by_position[position] = agent
+        if agent.has_new_messages():
+            self.notify_message(agent)
+
+    def remove(self, agent):
+        """Remove an agent from the schedule."""
+        super().remove(agent)
+        del self.__agents_by_position[self.__positions.pop(agent)]
+
+    def notify_message(self, agent):
+        """Mark an agent which received a message as ready to be activated."""
+        position = self.__positions.get(agent)
+        if position is None or position in self.__ready_positions:
+            return
+        self.__ready_positions.add(position)
+        if self.__current_position is not None and position <= self.__current_position:
+            self.__deferred.append(position)
+        else:
+            heappush(self.__ready, position)
+
+    def get_ready_count(self):
+        """Return the number of agents to activate."""
+        return len(self.__ready_positions)
+
+    def step(self):
+        """Activate the ready agents, one at a time in order of addition."""
+        ready = self.__ready
+        while ready:
+            position = heappop(ready)
+            self.__ready_positions.discard(position)
+            agent = self.__agents_by_position.get(position)
+            if agent is None:
+                continue
+            self.__current_position = position
+            agent.step()
+        self.__current_position = None
+        for position in self.__deferred:
+            heappush(ready, position)
+        self.__deferred.clear()
+        self.steps += 1
+        self.time += 1
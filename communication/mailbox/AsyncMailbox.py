@@ -0,0 +1,31 @@
+""" Creates an awaitable mailbox to receive messages. """
+
+import asyncio
+
+from communication.mailbox.Mailbox import Mailbox
+
+
+class AsyncMailbox(Mailbox):
+    """AsyncMailbox class.
+    Mailbox whose new messages can be awaited from a coroutine.
+
+    attr:
+        new_messages: The event set when a message is received
+    """
+
+    def __init__(self, **kwargs):
+        """Create a new AsyncMailbox (with the retention policy of Mailbox)."""
+        super().__init__(**kwargs)
+        self.__new_messages = asyncio.Event()
+
+    def receive_messages(self, message):
+        """Receive a message and wake up the coroutine waiting for it."""
+        super().receive_messages(message)
+        self.__new_messages.set()
+
+    async def wait_new_messages(self):
+        """Wait until there are unread messages and return them."""
+        while not self.has_new_messages():
+            self.__new_messages.clear()
+            await self.__new_messages.wait()
+        return self.get_new_messages()
@@ -1,52 +1,200 @@
 """ Creates a mailbox to receive messages. """
 
+import copy
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+from collections import deque
+
 
 class Mailbox:
     """Mailbox class.
     Class implementing the mailbox object which manages messages in communicating agents.
 
+    By default every received message is kept. The history of read messages can be
+    bounded with a retention policy:
+        - max_read_messages: only the last read messages are kept
+        - kept_performatives: only the messages with these performatives are kept in
+          the history and in the indexes (the others are still returned once as new
+          messages)
+        - archive_path: the read messages going past max_read_messages are appended to
+          this file (emptied when the mailbox is created) instead of being dropped, and
+          get_messages() iterates over them lazily (a copy of the mailbox archives to a
+          copy of the file, which it owns: the copy of the file is deleted when the copy
+          of the mailbox is)
+
     attr:
-        unread_messages: The list of unread messages
-        read_messages: The list of read messages
+        unread_messages: The queue of unread messages
+        read_messages: The queue of read messages
+        messages_from_performative: The kept messages indexed by performative
+        messages_from_exp: The kept messages indexed by sender
+        messages_count: The number of kept messages by (performative, sender)
     """
 
-    def __init__(self):
+    def __init__(
+        self, max_read_messages=None, kept_performatives=None, archive_path=None
+    ):
         """Create a new Mailbox."""
-        self.__unread_messages = []
-        self.__read_messages = []
+        self.__unread_messages = deque()
+        self.__read_messages = deque()
+        self.__messages_from_performative = {}
+        self.__messages_from_exp = {}
+        self.__messages_count = {}
+        self.__max_read_messages = max_read_messages
+        self.__kept_performatives = (
+            None if kept_performatives is None else frozenset(kept_performatives)
+        )
+        self.__archive_path = archive_path
+        self.__archived = False
+        if archive_path is not None:
+            # Start from an empty archive, without the messages of an earlier mailbox
+            open(archive_path, "wb").close()
+
+    def __deepcopy__(self, memo):
+        """Return a copy of the mailbox. Messages are immutable: only the queues and
+        the indexes are copied, not the messages. A mailbox with an archive gets its
+        own archive, a copy of the file in the same directory deleted with the copy of
+        the mailbox."""
+        mailbox = copy.copy(self)
+        memo[id(self)] = mailbox
+        mailbox.__unread_messages = deque(self.__unread_messages)
+        mailbox.__read_messages = deque(self.__read_messages)
+        mailbox.__messages_from_performative = {
+            performative: deque(messages)
+            for performative, messages in self.__messages_from_performative.items()
+        }
+        mailbox.__messages_from_exp = {
+            exp: deque(messages) for exp, messages in self.__messages_from_exp.items()
+        }
+        mailbox.__messages_count = dict(self.__messages_count)
+        if self.__archive_path is not None:
+            directory, name = os.path.split(os.path.abspath(self.__archive_path))
+            descriptor, mailbox.__archive_path = tempfile.mkstemp(
+                prefix=name + ".", dir=directory
+            )
+            os.close(descriptor)
+            weakref.finalize(mailbox, _remove_archive, mailbox.__archive_path)
+            if self.__archived:
+                shutil.copyfile(self.__archive_path, mailbox.__archive_path)
+        return mailbox
 
     def receive_messages(self, message):
-        """Receive a message and add it in the unread messages list."""
+        """Receive a message, add it in the unread messages queue and index it."""
         self.__unread_messages.append(message)
+        performative = message.get_performative()
+        if not self.__is_kept(performative):
+            return
+        exp = message.get_exp()
+        self.__messages_from_performative.setdefault(performative, deque()).append(
+            message
+        )
+        self.__messages_from_exp.setdefault(exp, deque()).append(message)
+        key = (performative, exp)
+        self.__messages_count[key] = self.__messages_count.get(key, 0) + 1
+
+    def has_new_messages(self):
+        """Return whether there are unread messages."""
+        return len(self.__unread_messages) > 0
 
     def get_new_messages(self):
-        """Return all the messages from unread messages list."""
-        unread_messages = self.__unread_messages.copy()
-        if len(unread_messages) > 0:
-            for messages in unread_messages:
-                self.__read_messages.append(messages)
+        """Return all the messages from unread messages queue, which are marked as read.
 
-        self.__unread_messages.clear()
+        The returned queue is handed over to the caller: the mailbox starts a new one.
+        """
+        unread_messages = self.__unread_messages
+        self.__unread_messages = deque()
+        if self.__kept_performatives is None:
+            self.__read_messages.extend(unread_messages)
+        else:
+            self.__read_messages.extend(
+                message
+                for message in unread_messages
+                if message.get_performative() in self.__kept_performatives
+            )
+        if (
+            self.__max_read_messages is not None
+            and len(self.__read_messages) > self.__max_read_messages
+        ):
+            self.__evict_read_messages()
         return unread_messages
 
     def get_messages(self):
-        """Return all the messages from both unread and read messages list."""
+        """Return all the messages from both unread and read messages list.
+
+        If an archive is used, return an iterator over the archived messages followed by
+        the read messages still in memory.
+        """
         if len(self.__unread_messages) > 0:
             self.get_new_messages()
+        if self.__archived:
+            return self.__iter_archived_messages()
         return self.__read_messages
 
     def get_messages_from_performative(self, performative):
-        """Return a list of messages which have the same performative."""
-        messages_from_performative = []
-        for message in self.__unread_messages + self.__read_messages:
-            if message.get_performative() == performative:
-                messages_from_performative.append(message)
-        return messages_from_performative
+        """Return a list of messages which have the same performative, in order of reception."""
+        return list(self.__messages_from_performative.get(performative, ()))
 
     def get_messages_from_exp(self, exp):
-        """Return a list of messages which have the same sender."""
-        messages_from_exp = []
-        for message in self.__unread_messages + self.__read_messages:
-            if message.get_exp() == exp:
-                messages_from_exp.append(message)
-        return messages_from_exp
+        """Return a list of messages which have the same sender, in order of reception."""
+        return list(self.__messages_from_exp.get(exp, ()))
+
+    def has_message_from(self, performative, exp):
+        """Return whether a message with this performative has been received from this sender."""
+        return self.__messages_count.get((performative, exp), 0) > 0
+
+    def __is_kept(self, performative):
+        """Return whether messages with this performative are kept in the history."""
+        return (
+            self.__kept_performatives is None
+            or performative in self.__kept_performatives
+        )
+
+    def __evict_read_messages(self):
+        """Remove the oldest read messages (and archive them) until the history fits."""
+        evicted_messages = []
+        while len(self.__read_messages) > self.__max_read_messages:
+            message = self.__read_messages.popleft()
+            evicted_messages.append(message)
+            performative = message.get_performative()
+            exp = message.get_exp()
+            # The oldest kept message is also the oldest one of its indexes
+            self.__pop_oldest(self.__messages_from_performative, performative)
+            self.__pop_oldest(self.__messages_from_exp, exp)
+            key = (performative, exp)
+            self.__messages_count[key] -= 1
+            if self.__messages_count[key] == 0:
+                del self.__messages_count[key]
+        if self.__archive_path is not None:
+            with open(self.__archive_path, "ab") as archive:
+                for message in evicted_messages:
+                    pickle.dump(message, archive, pickle.HIGHEST_PROTOCOL)
+            self.__archived = True
+
+    @staticmethod
+    def __pop_oldest(index, key):
+        """Remove the oldest message of an index entry, and the entry if it is empty."""
+        messages = index[key]
+        messages.popleft()
+        if len(messages) == 0:
+            del index[key]
+
+    def __iter_archived_messages(self):
+        """Iterate over the archived messages, then over the read messages."""
+        read_messages = list(self.__read_messages)
+        with open(self.__archive_path, "rb") as archive:
+            while True:
+                try:
+                    yield pickle.load(archive)
+                except EOFError:
+                    break
+        yield from read_messages
+
+
+def _remove_archive(path):
+    """Delete the archive of a copy of a mailbox (if it is still there)."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
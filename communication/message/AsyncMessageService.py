@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import asyncio
+
+from communication.message.MessageService import MessageService
+
+
+class AsyncMessageService(MessageService):
+    """AsyncMessageService class.
+    Message service delivering messages through an asyncio queue: sent messages are
+    delivered by the deliver_messages() coroutine, running in the event loop of the
+    agents (whose mailboxes are AsyncMailbox objects).
+
+    attr:
+        queue: the queue of messages to deliver (asyncio.Queue)
+    """
+
+    def __init__(self, scheduler):
+        """ Create a new AsyncMessageService object.
+        """
+        super().__init__(scheduler, instant_delivery=False)
+        self.__queue = asyncio.Queue()
+
+    def send_message(self, message):
+        """ Add the message to the queue of messages to deliver.
+        """
+        self.__queue.put_nowait(message)
+
+    def dispatch_messages(self):
+        """ Deliver at once all the messages of the queue.
+        """
+        while not self.__queue.empty():
+            self.dispatch_message(self.__queue.get_nowait())
+
+    async def deliver_messages(self):
+        """ Deliver the messages as they are sent, until cancelled.
+        """
+        while True:
+            message = await self.__queue.get()
+            self.dispatch_message(message)
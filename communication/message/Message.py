@@ -6,6 +6,8 @@ class Message:
     Class implementing the message object which is exchanged between agents through a message service
     during communication.
 
+    Messages are immutable: they can be shared between mailboxes and model snapshots.
+
     attr:
         from_agent: the sender of the message (id)
         to_agent: the receiver of the message (id)
@@ -13,13 +15,31 @@ class Message:
         content: the content of the message
      """
 
+    __slots__ = ("__from_agent", "__to_agent", "__message_performative", "__content")
+
     def __init__(self, from_agent, to_agent, message_performative, content):
         """ Create a new message.
         """
-        self.__from_agent = from_agent
-        self.__to_agent = to_agent
-        self.__message_performative = message_performative
-        self.__content = content
+        object.__setattr__(self, "_Message__from_agent", from_agent)
+        object.__setattr__(self, "_Message__to_agent", to_agent)
+        object.__setattr__(self, "_Message__message_performative", message_performative)
+        object.__setattr__(self, "_Message__content", content)
+
+    def __setattr__(self, name, value):
+        """ Messages are immutable.
+        """
+        raise AttributeError("Message objects are immutable")
+
+    def __reduce__(self):
+        """ Return how to pickle the message.
+        """
+        return Message, (self.__from_agent, self.__to_agent,
+                         self.__message_performative, self.__content)
+
+    def __deepcopy__(self, memo):
+        """ Messages are immutable: copies of a model share them.
+        """
+        return self
 
     def __str__(self):
         """ Return Message as a String.
@@ -4,31 +4,48 @@ class MessageService:
     """MessageService class.
     Class implementing the message service used to dispatch messages between communicating agents.
 
-    Not intended to be created more than once: it's a singleton.
+    Each model has its own message service, bound to the model of its scheduler and
+    stored as its message_service attribute (so that it lives as long as the model). The
+    last created message service is also the default instance returned by get_instance().
+
+    If the scheduler has a notify_message(agent) method (e.g. MessageActivation), it is
+    called each time a message is delivered to an agent.
+
+    Messages are only delivered to the agents of the schedule: the registered agents
+    are a cache of the scheduled agents by name, looked up again in the schedule when
+    an agent was removed from it (e.g. by scheduler.remove()) or replaced by another
+    agent with the same name.
 
     attr:
         scheduler: the scheduler of the sma (Scheduler)
         messages_to_proceed: the list of message to proceed mailbox of the agent (list)
+        agents: the registered agents indexed by name (dict)
     """
 
     __instance = None
 
     @staticmethod
-    def get_instance():
-        """ Static access method.
+    def get_instance(model=None):
+        """ Static access method: return the message service of the model if it has one,
+        the default (last created) message service otherwise.
         """
+        instance = getattr(model, "message_service", None)
+        if isinstance(instance, MessageService):
+            return instance
         return MessageService.__instance
 
     def __init__(self, scheduler, instant_delivery=True):
         """ Create a new MessageService object.
         """
-        if MessageService.__instance is not None:
-            raise Exception("This class is a singleton!")
-        else:
-            MessageService.__instance = self
-            self.__scheduler = scheduler
-            self.__instant_delivery = instant_delivery
-            self.__messages_to_proceed = []
+        MessageService.__instance = self
+        model = getattr(scheduler, "model", None)
+        if model is not None:
+            model.message_service = self
+        self.__scheduler = scheduler
+        self.__notify_message = getattr(scheduler, "notify_message", None)
+        self.__instant_delivery = instant_delivery
+        self.__messages_to_proceed = []
+        self.__agents = {}
 
     def set_instant_delivery(self, instant_delivery):
         """ Set the instant delivery parameter.
@@ -46,7 +63,10 @@ class MessageService:
     def dispatch_message(self, message):
         """ Dispatch the message to the right agent.
         """
-        self.find_agent_from_name(message.get_dest()).receive_message(message)
+        agent = self.find_agent_from_name(message.get_dest())
+        agent.receive_message(message)
+        if self.__notify_message is not None:
+            self.__notify_message(agent)
 
     def dispatch_messages(self):
         """ Proceed each message received by the message service.
@@ -57,9 +77,42 @@ class MessageService:
 
         self.__messages_to_proceed.clear()
 
+    def register_agent(self, agent):
+        """ Register an agent so that messages can be routed to it by name, replacing
+        the agent previously registered with the same name.
+        """
+        self.__agents[agent.get_name()] = agent
+
+    def unregister_agent(self, agent):
+        """ Unregister an agent, messages can no longer be routed to it.
+        """
+        if self.__agents.get(agent.get_name()) is agent:
+            del self.__agents[agent.get_name()]
+
     def find_agent_from_name(self, agent_name):
         """ Return the agent according to the agent name given.
         """
-        for agent in self.__scheduler.agents:
-            if agent.get_name() == agent_name:
-                return agent
+        agent = self.__agents.get(agent_name)
+        if agent is None or not self.__is_scheduled(agent):
+            # Pick up agents added to the scheduler without being registered, and drop
+            # the agents removed from it
+            agent = None
+            for scheduled_agent in self.__scheduler.agents:
+                if scheduled_agent.get_name() == agent_name:
+                    agent = scheduled_agent
+            if agent is None:
+                self.__agents.pop(agent_name, None)
+                raise ValueError(
+                    "No agent named " + repr(agent_name) + " in the message service"
+                )
+            self.register_agent(agent)
+        return agent
+
+    def __is_scheduled(self, agent):
+        """ Return whether an agent is in the schedule (without copying the agent set
+        of a mesa scheduler).
+        """
+        agents = getattr(self.__scheduler, "_agents", None)
+        if agents is None:
+            agents = self.__scheduler.agents
+        return agent in agents
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+
+import multiprocessing
+import os
+import queue
+import struct
+import threading
+import traceback
+import zlib
+from multiprocessing.connection import Client, Listener, wait
+
+# Header of the frames relayed by a SocketBroker: source and destination partitions
+_HEADER = struct.Struct("!II")
+
+# Interval (in seconds) at which run_partitions checks that its processes are alive
+POLL_INTERVAL = 0.1
+
+
+def get_partition(agent_name, n_partitions):
+    """ Return the partition hosting an agent when no route is given: a hash of its
+    name which does not change between processes (unlike hash()).
+    """
+    return zlib.crc32(str(agent_name).encode("utf-8")) % n_partitions
+
+
+class Transport:
+    """Transport class.
+    Carries serialized batches of messages between the partitions of a population of
+    agents (processes or nodes each hosting some of the agents).
+
+    Batches sent by a partition to another one are received in the order they were
+    sent.
+    """
+
+    def send(self, partition, data):
+        """ Send a batch (bytes) to a partition.
+        """
+        raise NotImplementedError
+
+    def receive(self):
+        """ Wait for the next batch sent to this partition and return its source
+        partition and the batch.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """ Release the resources of the transport.
+        """
+
+
+class QueueTransport(Transport):
+    """QueueTransport class.
+    Transport over one inbox queue per partition: queue.Queue for partitions hosted
+    by threads of a process, multiprocessing queues for partitions hosted by
+    processes.
+
+    attr:
+        partition: the partition using the transport (int)
+        queues: the inbox of each partition (list)
+    """
+
+    def __init__(self, partition, queues):
+        """ Create a new QueueTransport object.
+        """
+        self.__partition = partition
+        self.__queues = queues
+
+    def send(self, partition, data):
+        self.__queues[partition].put((self.__partition, data))
+
+    def receive(self):
+        return self.__queues[self.__partition].get()
+
+
+class LocalBroker:
+    """LocalBroker class.
+    Stand-in broker creating the inboxes of the partitions on the local machine:
+    queue.Queue objects by default (partitions run by threads, e.g. for tests), or the
+    queues of a multiprocessing context (partitions run by processes).
+
+    attr:
+        queues: the inbox of each partition (list)
+    """
+
+    def __init__(self, n_partitions, context=None):
+        """ Create a new LocalBroker object.
+        """
+        queue_class = queue.Queue if context is None else context.Queue
+        self.__queues = [queue_class() for _ in range(n_partitions)]
+
+    def get_transport(self, partition):
+        """ Return the transport of a partition.
+        """
+        return QueueTransport(partition, self.__queues)
+
+
+class SocketTransport(Transport):
+    """SocketTransport class.
+    Transport through a SocketBroker, over a TCP ((host, port) address) or UNIX
+    (path address) socket. The connection is opened on first use, so that the
+    transport can be created in a process and used in another one.
+
+    attr:
+        partition: the partition using the transport (int)
+        address: the address of the broker
+        authkey: the key authenticating the partitions to the broker (bytes)
+        connection: the connection to the broker (None until first use)
+    """
+
+    def __init__(self, partition, address, authkey=None):
+        """ Create a new SocketTransport object.
+        """
+        self.__partition = partition
+        self.__address = address
+        self.__authkey = authkey
+        self.__connection = None
+
+    def __getstate__(self):
+        """ Pickle the transport without its connection.
+        """
+        return self.__partition, self.__address, self.__authkey
+
+    def __setstate__(self, state):
+        self.__partition, self.__address, self.__authkey = state
+        self.__connection = None
+
+    def send(self, partition, data):
+        self.__connect().send_bytes(_HEADER.pack(self.__partition, partition) + data)
+
+    def receive(self):
+        frame = self.__connect().recv_bytes()
+        source, _ = _HEADER.unpack_from(frame)
+        return source, frame[_HEADER.size :]
+
+    def close(self):
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __connect(self):
+        """ Return the connection to the broker, opening it if needed.
+        """
+        if self.__connection is None:
+            self.__connection = Client(self.__address, authkey=self.__authkey)
+            self.__connection.send_bytes(struct.pack("!I", self.__partition))
+        return self.__connection
+
+
+class SocketBroker:
+    """SocketBroker class.
+    Broker relaying the batches of the partitions connected by SocketTransport
+    objects, in a background thread. Each connection has its own writer thread, so
+    that a partition which is not reading does not block the others.
+
+    attr:
+        n_partitions: the number of partitions to wait for (int)
+        listener: the socket listening for the partitions
+        authkey: the key authenticating the partitions (bytes)
+        thread: the thread relaying the batches
+        error: the error raised by serve() in the thread (None if there is none)
+        connect_timeout: the time given to the partitions to connect (in seconds, no
+            limit if None)
+        closed: whether the broker stopped waiting for partitions (bool)
+        accepting: whether the broker is waiting for partitions (bool)
+    """
+
+    def __init__(
+        self, n_partitions, address=("localhost", 0), authkey=None, connect_timeout=None
+    ):
+        """ Create a new SocketBroker object listening on a TCP ((host, port), port 0
+        for any free port) or UNIX (path) address.
+        """
+        self.__n_partitions = n_partitions
+        self.__authkey = os.urandom(16) if authkey is None else authkey
+        self.__listener = Listener(address, authkey=self.__authkey)
+        self.__thread = threading.Thread(target=self.__serve_in_thread, daemon=True)
+        self.__error = None
+        self.__connect_timeout = connect_timeout
+        self.__closed = False
+        self.__accepting = False
+
+    def get_address(self):
+        """ Return the address the broker listens on.
+        """
+        return self.__listener.address
+
+    def get_transport(self, partition):
+        """ Return the transport of a partition.
+        """
+        return SocketTransport(partition, self.get_address(), self.__authkey)
+
+    def start(self):
+        """ Relay the batches in a background thread.
+        """
+        self.__thread.start()
+
+    def join(self, timeout=None):
+        """ Wait for every partition to close its connection, and raise the error of
+        the thread if serve() failed.
+        """
+        self.__thread.join(timeout)
+        if self.__error is not None:
+            raise self.__error
+
+    def close(self):
+        """ Stop waiting for the partitions which are not connected yet: the connected
+        ones are disconnected and serve() raises a RuntimeError.
+        """
+        self.__closed = True
+        if self.__accepting:
+            # Wake up the accept() of serve()
+            try:
+                Client(self.get_address(), authkey=self.__authkey).close()
+            except OSError:
+                pass
+
+    def __serve_in_thread(self):
+        """ Serve in the background thread, keeping the error for join().
+        """
+        try:
+            self.serve()
+        except RuntimeError as error:
+            self.__error = error
+
+    def serve(self):
+        """ Accept the connections of the partitions, then relay their batches until
+        they are all closed.
+
+        Raise a RuntimeError if the partitions are not all connected within the connect
+        timeout, or when close() is called before.
+        """
+        connections = {}
+        timer = None
+        if self.__connect_timeout is not None:
+            timer = threading.Timer(self.__connect_timeout, self.close)
+            timer.daemon = True
+            timer.start()
+        self.__accepting = True
+        try:
+            while len(connections) < self.__n_partitions:
+                if self.__closed:
+                    for connection in connections.values():
+                        connection.close()
+                    raise RuntimeError(
+                        str(len(connections))
+                        + " of "
+                        + str(self.__n_partitions)
+                        + " partitions connected to the broker"
+                    )
+                connection = self.__listener.accept()
+                if self.__closed:
+                    connection.close()
+                    continue
+                (partition,) = struct.unpack("!I", connection.recv_bytes())
+                connections[partition] = connection
+        finally:
+            self.__accepting = False
+            if timer is not None:
+                timer.cancel()
+            self.__listener.close()
+        outboxes = {partition: queue.SimpleQueue() for partition in connections}
+        writers = [
+            threading.Thread(
+                target=_write_frames, args=(connections[partition], outbox), daemon=True
+            )
+            for partition, outbox in outboxes.items()
+        ]
+        for writer in writers:
+            writer.start()
+
+        open_connections = list(connections.values())
+        while open_connections:
+            for connection in wait(open_connections):
+                try:
+                    frame = connection.recv_bytes()
+                except (EOFError, OSError):
+                    open_connections.remove(connection)
+                    continue
+                _, destination = _HEADER.unpack_from(frame)
+                outboxes[destination].put(frame)
+        for outbox in outboxes.values():
+            outbox.put(None)
+        for writer in writers:
+            writer.join()
+        for connection in connections.values():
+            connection.close()
+
+
+def _write_frames(connection, outbox):
+    """ Send the frames of an outbox to a connection, until None.
+    """
+    while (frame := outbox.get()) is not None:
+        try:
+            connection.send_bytes(frame)
+        except OSError:
+            # The partition is gone: drop its frames
+            pass
+
+
+def run_partitions(
+    target,
+    n_partitions,
+    args=(),
+    transport="queue",
+    address=("localhost", 0),
+    context=None,
+):
+    """ Run each partition of a population of agents in its own process and return
+    the result of each partition.
+
+    Each process calls target(transport, partition, n_partitions, *args), which
+    typically builds the agents of the partition with a PartitionedMessageService and
+    runs the steps of the model. Every partition must dispatch the messages the same
+    number of times.
+
+    A RuntimeError is raised if a partition fails or if its process exits without
+    returning a result (the processes are checked every POLL_INTERVAL seconds).
+
+    :param transport: "queue" (multiprocessing queues) or "socket" (SocketBroker on
+        the given address)
+    :param context: the multiprocessing context (the default one if None)
+    :return: the values returned by target, by partition (list)
+    """
+    context = multiprocessing.get_context() if context is None else context
+    if transport == "queue":
+        broker = LocalBroker(n_partitions, context)
+    elif transport == "socket":
+        broker = SocketBroker(n_partitions, address)
+        broker.start()
+    else:
+        raise ValueError("Unknown transport: " + repr(transport))
+
+    results_queue = context.Queue()
+    processes = [
+        context.Process(
+            target=_run_partition,
+            args=(
+                target,
+                broker.get_transport(partition),
+                partition,
+                n_partitions,
+                args,
+                results_queue,
+            ),
+            daemon=True,
+        )
+        for partition in range(n_partitions)
+    ]
+    for process in processes:
+        process.start()
+    results = [None] * n_partitions
+    missing = set(range(n_partitions))
+    exited = set()
+    try:
+        while missing:
+            try:
+                partition, result, error = results_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                # A partition which exited is given one more interval for its result
+                dead = sorted(missing & exited)
+                if dead:
+                    raise RuntimeError(
+                        "Partition "
+                        + str(dead[0])
+                        + " exited with code "
+                        + str(processes[dead[0]].exitcode)
+                        + " without a result"
+                    )
+                exited.update(
+                    partition
+                    for partition in missing
+                    if processes[partition].exitcode is not None
+                )
+                continue
+            if error is not None:
+                raise RuntimeError("Partition " + str(partition) + " failed:\n" + error)
+            results[partition] = result
+            missing.discard(partition)
+    finally:
+        if transport == "socket":
+            broker.close()
+        for process in processes:
+            if process.is_alive():
+                process.join(1)
+            if process.is_alive():
+                process.terminate()
+    return results
+
+
+def _run_partition(target, transport, partition, n_partitions, args, results_queue):
+    """ Run a partition in a worker process and send back its result or its error.
+    """
+    try:
+        result = target(transport, partition, n_partitions, *args)
+    except BaseException:
+        results_queue.put((partition, None, traceback.format_exc()))
+    else:
+        results_queue.put((partition, result, None))
+    finally:
+        transport.close()
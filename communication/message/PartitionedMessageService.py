@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import pickle
+from collections import deque
+from functools import partial
+
+from communication.message.MessageService import MessageService
+from communication.message.MessageTransport import get_partition
+
+
+class PartitionedMessageService(MessageService):
+    """PartitionedMessageService class.
+    Message service of one partition of a population of agents spread over several
+    processes or nodes. Messages to the agents of the partition are delivered as by
+    MessageService; the others are pickled and sent through a Transport to the
+    partition hosting their receiver.
+
+    dispatch_messages() is a step barrier: it sends the batch of messages of the step
+    to every other partition (possibly empty), delivers the local messages, then waits
+    for the batch of the step of every other partition and delivers it, by order of
+    partition. Every partition must therefore call it once per step. Remote messages
+    are delivered by the next dispatch_messages(), even with instant delivery.
+
+    attr:
+        transport: the transport to the other partitions (Transport)
+        partition: the index of this partition (int)
+        n_partitions: the number of partitions (int)
+        partition_of: the partition hosting each agent, given its name (callable)
+        outgoing: the messages to send to each partition at the next dispatch (list)
+        received: the batches already received from each partition for the next
+            steps (list)
+    """
+
+    def __init__(
+        self,
+        scheduler,
+        transport,
+        partition,
+        n_partitions,
+        partition_of=None,
+        instant_delivery=True,
+    ):
+        """ Create a new PartitionedMessageService object.
+
+        :param partition_of: the partition of each agent name, as a dict or a
+            callable (get_partition, a hash of the name, if None)
+        """
+        super().__init__(scheduler, instant_delivery)
+        if partition_of is None:
+            partition_of = partial(get_partition, n_partitions=n_partitions)
+        elif isinstance(partition_of, dict):
+            partition_of = partition_of.__getitem__
+        self.__transport = transport
+        self.__partition = partition
+        self.__n_partitions = n_partitions
+        self.__partition_of = partition_of
+        self.__outgoing = [[] for _ in range(n_partitions)]
+        self.__received = [deque() for _ in range(n_partitions)]
+
+    def get_partition(self):
+        """ Return the index of the partition of the message service.
+        """
+        return self.__partition
+
+    def is_local(self, agent_name):
+        """ Return whether an agent is hosted by this partition.
+        """
+        return self.__partition_of(agent_name) == self.__partition
+
+    def send_message(self, message):
+        """ Send a message to a local agent as MessageService does, or keep it for the
+        partition of its receiver until the next dispatch.
+        """
+        partition = self.__partition_of(message.get_dest())
+        if partition == self.__partition:
+            super().send_message(message)
+        else:
+            self.__outgoing[partition].append(message)
+
+    def dispatch_messages(self):
+        """ Exchange the messages of the step with the other partitions and deliver
+        the messages received by the local agents.
+        """
+        others = [p for p in range(self.__n_partitions) if p != self.__partition]
+        for partition in others:
+            outgoing = self.__outgoing[partition]
+            self.__transport.send(
+                partition, pickle.dumps(outgoing, pickle.HIGHEST_PROTOCOL)
+            )
+            outgoing.clear()
+
+        super().dispatch_messages()
+
+        # Batches of a partition already in its next step are kept for later
+        received = self.__received
+        while any(not received[partition] for partition in others):
+            source, data = self.__transport.receive()
+            received[source].append(data)
+        for partition in others:
+            for message in pickle.loads(received[partition].popleft()):
+                self.dispatch_message(message)
+
+    def close(self):
+        """ Close the transport to the other partitions.
+        """
+        self.__transport.close()
@@ -0,0 +1,106 @@
+""" Writes synthetic item catalogs with the schema of the weapons dataset
+
+Run with: python -m communication.preferences.CatalogGenerator PATH --items 1000000
+"""
+
+import argparse
+
+import numpy as np
+
+from communication.preferences.CriterionName import criterion_name_dict
+from communication.preferences.DatasetLoader import CHUNK_ROWS, ITEM_COLUMN
+
+
+def _uniform(rng, size, low, high):
+    """Values drawn uniformly from low to high."""
+    return rng.integers(low, high + 1, size)
+
+
+def _normal(rng, size, low, high):
+    """Values drawn around the middle of the range (a quarter of the range as
+    standard deviation), clipped to the range."""
+    values = rng.normal((low + high) / 2, (high - low) / 4, size)
+    return np.clip(np.rint(values), low, high).astype(np.int64)
+
+
+def _skewed(rng, size, low, high):
+    """Values drawn from an exponential distribution: most values are low, a few
+    are high."""
+    values = low + rng.exponential((high - low) / 4, size)
+    return np.clip(np.rint(values), low, high).astype(np.int64)
+
+
+DISTRIBUTIONS = {"uniform": _uniform, "normal": _normal, "skewed": _skewed}
+
+
+def write_catalog(
+    path,
+    n_items,
+    criterion_names=None,
+    distribution="uniform",
+    low=1,
+    high=10,
+    seed=0,
+    chunk_size=CHUNK_ROWS,
+):
+    """Write a synthetic catalog of n_items items, chunk_size rows at a time.
+
+    : param criterion_names : list of str - the criterion columns, among the names of
+    criterion_name_dict (all of them if None)
+    : param distribution : str - the distribution of the integer values from low to
+    high, among DISTRIBUTIONS
+    : param seed : int - seed of the random generator, a given seed always giving the
+    same catalog
+    """
+    if criterion_names is None:
+        criterion_names = list(criterion_name_dict)
+    unknown_names = [
+        name for name in criterion_names if name not in criterion_name_dict
+    ]
+    if unknown_names:
+        raise ValueError(f"Unknown criterion names: {unknown_names}")
+    draw = DISTRIBUTIONS.get(distribution)
+    if draw is None:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    if low > high:
+        raise ValueError("low must not be greater than high")
+
+    rng = np.random.default_rng(seed)
+    value_strings = [str(value) for value in range(low, high + 1)]
+    with open(path, "w", encoding="utf-8") as catalog:
+        catalog.write(";".join([ITEM_COLUMN, *criterion_names]) + "\n")
+        for start in range(0, n_items, chunk_size):
+            stop = min(start + chunk_size, n_items)
+            values = draw(rng, (stop - start, len(criterion_names)), low, high)
+            catalog.writelines(
+                f"item {i};"
+                + ";".join([value_strings[value - low] for value in row])
+                + "\n"
+                for i, row in zip(range(start, stop), values.tolist())
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="file to write the catalog to")
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument(
+        "--criteria",
+        nargs="+",
+        choices=list(criterion_name_dict),
+        help="criterion columns (all of them by default)",
+    )
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--low", type=int, default=1)
+    parser.add_argument("--high", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+    write_catalog(
+        arguments.path,
+        arguments.items,
+        arguments.criteria,
+        arguments.distribution,
+        arguments.low,
+        arguments.high,
+        arguments.seed,
+    )
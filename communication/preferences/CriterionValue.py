@@ -4,13 +4,48 @@
 class CriterionValue:
     """CriterionValue class.
     This class implements the CriterionValue object which associates an item with a CriterionName and a Value.
+
+    CriterionValue objects are immutable and hashable: two criterion values are equal if
+    they have the same item, criterion name and value.
     """
+
+    __slots__ = ("__item", "__criterion_name", "__value")
+
     def __init__(self, item, criterion_name, value):
         """Creates a new CriterionValue.
         """
-        self.__item = item
-        self.__criterion_name = criterion_name
-        self.__value = value
+        object.__setattr__(self, "_CriterionValue__item", item)
+        object.__setattr__(self, "_CriterionValue__criterion_name", criterion_name)
+        object.__setattr__(self, "_CriterionValue__value", value)
+
+    def __setattr__(self, name, value):
+        """CriterionValue objects are immutable.
+        """
+        raise AttributeError("CriterionValue objects are immutable")
+
+    def __reduce__(self):
+        """Returns how to pickle the criterion value.
+        """
+        return CriterionValue, (self.__item, self.__criterion_name, self.__value)
+
+    def __deepcopy__(self, memo):
+        """CriterionValue objects are immutable: a copy is the object itself.
+        """
+        return self
+
+    def __eq__(self, other):
+        """Returns whether both criterion values have the same item, criterion name and value.
+        """
+        if not isinstance(other, CriterionValue):
+            return NotImplemented
+        return (self.__item, self.__criterion_name, self.__value) == (
+            other.__item, other.__criterion_name, other.__value
+        )
+
+    def __hash__(self):
+        """Returns the hash of the criterion value.
+        """
+        return hash((self.__item, self.__criterion_name, self.__value))
 
     def get_item(self):
         """Returns the item.
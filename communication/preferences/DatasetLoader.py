@@ -0,0 +1,174 @@
+""" Loads an item dataset into Preferences, with an on-disk binary cache """
+
+import gc
+import json
+import os
+import tempfile
+from itertools import repeat
+
+import numpy as np
+
+from communication.preferences.CriterionName import criterion_find
+from communication.preferences.Item import Item
+
+DATASET_PATH = "weapons_dataset.csv"
+ITEM_COLUMN = "WEAPON"
+CACHE_VALUES_SUFFIX = ".cache.npy"
+CACHE_META_SUFFIX = ".cache.json"
+CHUNK_ROWS = 100000
+COUNT_BLOCK_BYTES = 2**20
+
+
+def load_dataset(path, preferences, use_cache=True, chunk_size=CHUNK_ROWS):
+    """Load a ';'-separated item dataset (one item column, one column per criterion)
+    column-wise into the preferences.
+
+    The dataset is parsed chunk_size rows at a time, each chunk being added to the
+    preferences as soon as it is parsed, so that loading a large catalog takes little
+    more memory than the loaded values themselves.
+
+    When use_cache is True, the parsed columns are stored next to the dataset in a
+    binary cache which is reused as long as the dataset file is unchanged.
+
+    : param path : str - path of the dataset
+    : param preferences : Preferences - preferences to fill
+    : param chunk_size : int - number of rows parsed at a time
+    : return : list of the loaded items, in dataset order
+    """
+    columns = _read_cache(path) if use_cache else None
+
+    # Creating millions of items triggers many useless garbage collections
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        if columns is not None:
+            return _add_items(preferences, *columns)
+        value_matrix = preferences.get_value_matrix()
+        start = len(value_matrix)
+        items = []
+        criterion_columns = None
+        for item_names, criterion_columns, values in _read_csv_chunks(path, chunk_size):
+            items.extend(_add_items(preferences, item_names, criterion_columns, values))
+            if len(items) == len(item_names):
+                # Allocate the whole catalog once the type of the values is known
+                value_matrix.reserve(start + _count_rows(path))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    if use_cache and criterion_columns is not None:
+        values = value_matrix.get_values()[start:]
+        matrix_columns = [
+            value_matrix.get_column(criterion_find(column))
+            for column in criterion_columns
+        ]
+        if matrix_columns != list(range(values.shape[1])):
+            values = values[:, matrix_columns]
+        _write_cache(
+            path, [item.get_name() for item in items], criterion_columns, values
+        )
+    return items
+
+
+def _add_items(preferences, item_names, criterion_columns, values):
+    """Create the items of a block of rows, add their values to the preferences and
+    return them."""
+    items = list(map(Item, item_names, repeat("", len(item_names))))
+    preferences.add_criterion_values(
+        items, [criterion_find(column) for column in criterion_columns], values
+    )
+    return items
+
+
+def _read_csv_chunks(path, chunk_size):
+    """Parse the dataset chunk_size rows at a time, yielding the item names, criterion
+    columns and values of each chunk."""
+    import pandas as pd
+
+    with pd.read_csv(path, sep=";", chunksize=chunk_size) as reader:
+        for dataset in reader:
+            criterion_columns = [
+                column for column in dataset.columns if column != ITEM_COLUMN
+            ]
+            yield (
+                dataset[ITEM_COLUMN].astype(str).tolist(),
+                criterion_columns,
+                dataset[criterion_columns].to_numpy(),
+            )
+
+
+def _count_rows(path):
+    """Return an upper bound of the number of rows of the dataset (its number of lines
+    but the header), reading it by blocks."""
+    n_lines = 0
+    last_block = b"\n"
+    with open(path, "rb") as dataset:
+        while block := dataset.read(COUNT_BLOCK_BYTES):
+            n_lines += block.count(b"\n")
+            last_block = block
+    if not last_block.endswith(b"\n"):
+        n_lines += 1
+    return max(0, n_lines - 1)
+
+
+def _source_signature(path):
+    """Return what identifies a version of the dataset file."""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _read_cache(path):
+    """Return the cached columns of the dataset, or None if there is no valid cache."""
+    try:
+        with open(path + CACHE_META_SUFFIX, encoding="utf-8") as meta_file:
+            meta = json.load(meta_file)
+        if meta["source"] != _source_signature(path):
+            return None
+        values = np.load(path + CACHE_VALUES_SUFFIX, mmap_mode="r")
+    except (OSError, ValueError, KeyError):
+        return None
+    if values.shape != (len(meta["items"]), len(meta["criteria"])):
+        return None
+    return meta["items"], meta["criteria"], values
+
+
+def _write_cache(path, item_names, criterion_columns, values):
+    """Store the columns of the dataset in the binary cache (silently skipped if the
+    directory is not writable)."""
+    meta = {
+        "source": _source_signature(path),
+        "items": item_names,
+        "criteria": criterion_columns,
+    }
+    try:
+        _replace_file(
+            path + CACHE_VALUES_SUFFIX,
+            "wb",
+            lambda values_file: np.save(values_file, values),
+        )
+        # The metadata is written last so that it only validates a complete cache
+        _replace_file(
+            path + CACHE_META_SUFFIX,
+            "w",
+            lambda meta_file: json.dump(meta, meta_file),
+        )
+    except OSError:
+        pass
+
+
+def _replace_file(path, mode, write):
+    """Write a file through a temporary file of the same directory, unique to this
+    call, which replaces it once complete: other processes reading (or mapping) the
+    file keep the previous version and never see a partial one."""
+    directory, name = os.path.split(path)
+    descriptor, temporary_path = tempfile.mkstemp(
+        suffix=".tmp", prefix=name + ".", dir=directory or "."
+    )
+    try:
+        with os.fdopen(
+            descriptor, mode, encoding=None if "b" in mode else "utf-8"
+        ) as file:
+            write(file)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
@@ -1,19 +1,63 @@
 #!/usr/bin/env python3
 
+from weakref import ref
+
+# The interned items, weakly referenced by (class, name, description)
+_interned_items = {}
+
+
+class _InternedItemRef(ref):
+    """Weak reference to an interned item, which knows its key in the interned items."""
+
+    __slots__ = ("key",)
+
+
+def _forget_interned_item(item_ref):
+    """Remove an interned item which has been garbage collected."""
+    if _interned_items.get(item_ref.key) is item_ref:
+        del _interned_items[item_ref.key]
+
 
 class Item:
     """Item class.
     This class implements the objects about which the argument will be conducted.
 
+    Items are immutable and interned: creating an item with the name and description
+    of an existing one returns the existing item, so that equal items are the same
+    object and compare and hash by id.
+
     attr:
         name: the name of the item
         description: the description of the item
     """
 
-    def __init__(self, name, description):
-        """Creates a new Item."""
-        self.__name = name
-        self.__description = description
+    __slots__ = ("__name", "__description", "__weakref__")
+
+    def __new__(cls, name, description):
+        """Creates a new Item, or returns the existing one."""
+        key = (cls, name, description)
+        item_ref = _interned_items.get(key)
+        item = None if item_ref is None else item_ref()
+        if item is None:
+            item = object.__new__(cls)
+            object.__setattr__(item, "_Item__name", name)
+            object.__setattr__(item, "_Item__description", description)
+            item_ref = _InternedItemRef(item, _forget_interned_item)
+            item_ref.key = key
+            _interned_items[key] = item_ref
+        return item
+
+    def __setattr__(self, name, value):
+        """Items are immutable."""
+        raise AttributeError("Item objects are immutable")
+
+    def __reduce__(self):
+        """Returns how to pickle the item (unpickled items are interned too)."""
+        return type(self), (self.__name, self.__description)
+
+    def __deepcopy__(self, memo):
+        """Items are immutable and interned: a copy is the item itself."""
+        return self
 
     def __str__(self):
         """Returns Item as a String."""
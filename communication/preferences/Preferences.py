@@ -1,10 +1,15 @@
-""" Module to generate Preferences """
+"""Module to generate Preferences"""
 
-import pandas as pd
+import copy
 
+import numpy as np
+
+from arguments.couplevalue import CoupleValue
 from communication.preferences.CriterionName import criterion_find
-from communication.preferences.CriterionValue import CriterionValue
-from communication.preferences.Item import Item
+from communication.preferences.DatasetLoader import load_dataset
+from communication.preferences.ValueMatrix import ValueMatrix
+
+CRITERION_WEIGHT = 100
 
 
 class Preferences:
@@ -13,13 +18,41 @@ class Preferences:
 
     attr:
         criterion_name_list: the list of criterion name (ordered by importance)
-        criterion_value_list: the list of criterion value
+        value_matrix: the item x criterion matrix of criterion values (ValueMatrix),
+            which can be shared by the preferences of many agents
+        score_index_key: the key of the scores and ranks of the items for the criterion
+            name list, built lazily and cached by the value matrix
+        better_items_key: the key of the first better items of each criterion for the
+            criterion name list, built lazily and cached by the value matrix
+        weights_key: the key of the criterion weights for the criterion name list,
+            cached by the value matrix, as the score and row of the last item of the
+            top percents of the list (a few numbers per criterion name list)
+        premises: for each item, the premises for and against it (built lazily, and
+            dropped when the values or the criterion name list change)
     """
 
-    def __init__(self):
-        """Creates a new Preferences object."""
+    def __init__(self, value_matrix=None):
+        """Creates a new Preferences object, using the given value matrix if any."""
         self.__criterion_name_list = []
-        self.__criterion_value_list = []
+        self.__value_matrix = ValueMatrix() if value_matrix is None else value_matrix
+        self.__score_index_key = ("score_index", ())
+        self.__weights_key = ("weights", ())
+        self.__better_items_key = ("better_items", ())
+        self.__premises = {}
+        self.__premises_version = None
+
+    def __deepcopy__(self, memo):
+        """Returns a copy of the preferences, sharing the value matrix copy-on-write
+        and the cached premises until one of them changes."""
+        preferences = Preferences(copy.deepcopy(self.__value_matrix, memo))
+        memo[id(self)] = preferences
+        preferences.__criterion_name_list = list(self.__criterion_name_list)
+        preferences.__score_index_key = self.__score_index_key
+        preferences.__weights_key = self.__weights_key
+        preferences.__better_items_key = self.__better_items_key
+        preferences.__premises = self.__premises
+        preferences.__premises_version = self.__premises_version
+        return preferences
 
     def get_criterion_name_list(self):
         """Returns the list of criterion name."""
@@ -27,25 +60,65 @@ class Preferences:
 
     def get_criterion_value_list(self):
         """Returns the list of criterion value."""
-        return self.__criterion_value_list
+        return self.__value_matrix.get_criterion_value_list()
+
+    def get_value_matrix(self):
+        """Returns the item x criterion matrix of criterion values."""
+        return self.__value_matrix
 
     def set_criterion_name_list(self, criterion_name_list):
         """Sets the list of criterion name."""
         self.__criterion_name_list = criterion_name_list
+        self.__score_index_key = ("score_index", tuple(criterion_name_list))
+        self.__weights_key = ("weights", tuple(criterion_name_list))
+        self.__better_items_key = ("better_items", tuple(criterion_name_list))
+        self.__premises = {}
 
     def add_criterion_value(self, criterion_value):
-        """Adds a criterion value in the list."""
-        self.__criterion_value_list.append(criterion_value)
+        """Adds a criterion value in the matrix."""
+        self.__value_matrix.set_value(
+            criterion_value.get_item(),
+            criterion_value.get_criterion_name(),
+            criterion_value.get_value(),
+        )
+
+    def add_criterion_values(self, item_list, criterion_name_list, values):
+        """Adds an item x criterion block of values (N items, C criteria, N x C values)."""
+        self.__value_matrix.set_values(item_list, criterion_name_list, values)
 
     def get_value(self, item, criterion_name):
         """Gets the value for a given item and a given criterion name."""
-        values = self.get_criterion_value_list()
-        for value in values:
-            if (
-                value.get_item() == item
-                and value.get_criterion_name() == criterion_name
-            ):
-                return value.get_value()
+        return self.__value_matrix.get_value(item, criterion_name)
+
+    def get_items_better_than(self, criterion_name, value):
+        """Returns the items with a value greater than the given one on a criterion,
+        ordered by increasing value."""
+        return self.__value_matrix.get_items_better_than(criterion_name, value)
+
+    def get_first_better_item(self, criterion_name, value):
+        """Returns the first item with a value greater than the given one on a
+        criterion, the items being sorted by preference: the better item with the
+        lowest rank (None if there is none), read from the first better items of the
+        criterion name list."""
+        column = self.__value_matrix.get_column(criterion_name)
+        if column is None:
+            return None
+        tables = self.__value_matrix.get_shared_index(
+            self.__better_items_key, self.__build_first_better_items
+        )
+        values, rows = tables[2 * column], tables[2 * column + 1]
+        start = np.searchsorted(values, value, side="right")
+        if start == len(values):
+            return None
+        return self.__value_matrix.get_items()[rows[start]]
+
+    def get_next_better_item(self, criterion_name, value):
+        """Returns the item with the smallest value greater than the given one on a criterion."""
+        return self.__value_matrix.get_next_better_item(criterion_name, value)
+
+    def get_best_item(self, criterion_name):
+        """Returns the item with the greatest value on a criterion."""
+        return self.__value_matrix.get_best_item(criterion_name)
 
     def is_preferred_criterion(self, criterion_name_1, criterion_name_2):
         """Returns if a criterion 1 is preferred to the criterion 2."""
@@ -57,22 +130,195 @@ class Preferences:
 
     def is_preferred_item(self, item_1, item_2):
         """Returns if the item 1 is preferred to the item 2."""
-        return item_1.get_score(self) > item_2.get_score(self)
+        return self.get_score(item_1) > self.get_score(item_2)
 
     def most_preferred(self, item_list):
-        """Returns the most preferred item from a list."""
-        item_list.sort(key=lambda x: x.get_score(self), reverse=True)
-        return item_list[0]
+        """Returns the most preferred item from a list (the first one in case of a tie)."""
+        return max(item_list, key=self.get_score)
+
+    def get_score(self, item):
+        """Returns the score of an item, from its values and the criterion weights."""
+        (weights,) = self.__get_weights()
+        return (self.__value_matrix.get_values()[self.__get_row(item)] @ weights).item()
+
+    def get_rank(self, item):
+        """Returns the rank of an item among all the items (0 is the most preferred),
+        read from the score index."""
+        _, _, ranks = self.__get_score_index()
+        return ranks[self.__get_row(item)].item()
+
+    def get_top_items(self, k):
+        """Returns the k most preferred items, from the most preferred to the least."""
+        _, order, _ = self.__get_score_index()
+        items = self.__value_matrix.get_items()
+        return [items[row] for row in order[:k]]
+
+    def is_item_among_top_percent(self, item, percent):
+        """Returns whether an item is among the top percent of all the preferred items
+        (whether its rank is below the number of items in the top percent), comparing
+        its score to the score and row of the last item of the top percent."""
+        k = int(len(self.__value_matrix) * percent / 100)
+        if k <= 0:
+            return False
+        row = self.__get_row(item)
+        weights, cutoff_score, cutoff_row = self.__value_matrix.get_shared_index(
+            ("top_cutoff", self.__weights_key[1], k),
+            lambda: self.__build_top_cutoff(k),
+        )
+        score = self.__value_matrix.get_values()[row] @ weights
+        return score > cutoff_score[0] or (
+            score == cutoff_score[0] and row <= cutoff_row[0]
+        )
 
-    def is_item_among_top_10_percent(self, item, item_list):
+    def is_item_among_top_10_percent(self, item, item_list=None):
         """
         Return whether a given item is among the top 10 percent of the preferred items.
 
+        The item list is not modified. When no list is given, all the items of the
+        preferences are considered and the answer is read from the score index.
+
         :return: a boolean, True means that the item is among the favourite ones
         """
-        item_list.sort(key=lambda x: x.get_score(self), reverse=True)
-        top_20_percent = int(len(item_list) * 0.1)
-        return item in item_list[:top_20_percent]
+        if item_list is None:
+            return self.is_item_among_top_percent(item, 10)
+        if item not in item_list:
+            return False
+        # Position of the item in the list stably sorted by decreasing score
+        scores = np.array([self.get_score(other) for other in item_list])
+        position = item_list.index(item)
+        rank = np.count_nonzero(scores > scores[position]) + np.count_nonzero(
+            scores[:position] == scores[position]
+        )
+        return rank < int(len(item_list) * 0.1)
+
+    def get_premises(self, item):
+        """Returns the premises for an item (criteria with a value over 4) and against
+        it (criteria with a value under 5), sorted by order of importance.
+
+        :return: a tuple of two tuples of CoupleValue, cached until a value or the
+        criterion name list changes
+        """
+        version = self.__value_matrix.get_version()
+        if self.__premises_version != version:
+            # A new cache, as the old one may be shared with a copy of the preferences
+            self.__premises = {}
+            self.__premises_version = version
+        premises = self.__premises.get(item)
+        if premises is None:
+            pro_premises = []
+            con_premises = []
+            for criterion_name in self.__criterion_name_list:
+                value = self.__value_matrix.get_value(item, criterion_name)
+                if value is None:
+                    continue
+                if value > 4:
+                    pro_premises.append(CoupleValue(criterion_name, value))
+                if value < 5:
+                    con_premises.append(CoupleValue(criterion_name, value))
+            premises = (tuple(pro_premises), tuple(con_premises))
+            self.__premises[item] = premises
+        return premises
+
+    def get_criterion_weights(self, criterion_name_lists=None):
+        """Returns the weight of each column of the value matrix according to the
+        criterion name list (100 for the most important criterion, then halved).
+
+        :param criterion_name_lists: optional sequence of P criterion name lists of the
+        same length (e.g. a P x 6 array of orderings) to weight instead of the own list
+        :return: an array of C weights, or a P x C array if criterion_name_lists is given
+        """
+        if criterion_name_lists is None:
+            return self.get_criterion_weights([self.__criterion_name_list])[0]
+        orderings = np.asarray(criterion_name_lists)
+        if orderings.ndim != 2:
+            orderings = orderings.reshape(len(orderings), -1)
+        weights = np.zeros(
+            (len(orderings), len(self.__value_matrix.get_criterion_names()))
+        )
+        # Map each criterion name of the orderings to its column (-1 if unknown)
+        criterion_names, inverse = np.unique(orderings, return_inverse=True)
+        columns = np.array(
+            [
+                -1 if column is None else column
+                for column in map(self.__value_matrix.get_column, criterion_names)
+            ],
+            dtype=np.intp,
+        )[inverse.reshape(orderings.shape)]
+        positions = np.broadcast_to(np.arange(orderings.shape[1]), orderings.shape)
+        known = columns >= 0
+        np.add.at(
+            weights,
+            (np.nonzero(known)[0], columns[known]),
+            CRITERION_WEIGHT * 0.5 ** positions[known],
+        )
+        return weights
+
+    def score_items(self, item_list=None, criterion_name_lists=None):
+        """Returns the scores of many items in a single matrix product.
+
+        :param item_list: the items to score (all the items of the preferences if None)
+        :param criterion_name_lists: optional sequence of P criterion name lists used
+        instead of the own list, to score the items for P agent profiles at once
+        :return: an array of N scores, or a P x N array if criterion_name_lists is given
+        """
+        values = self.__value_matrix.get_values()
+        if item_list is not None:
+            values = values[[self.__get_row(item) for item in item_list]]
+        if criterion_name_lists is None:
+            return values @ self.get_criterion_weights()
+        return self.get_criterion_weights(criterion_name_lists) @ values.T
+
+    def __get_row(self, item):
+        """Returns the row of an item in the value matrix."""
+        row = self.__value_matrix.get_row(item)
+        if row is None:
+            raise KeyError(f"No criterion value for item {item}")
+        return row
+
+    def __get_weights(self):
+        """Returns the criterion weights of the criterion name list, shared with the
+        preferences using the same matrix and list."""
+        return self.__value_matrix.get_shared_index(
+            self.__weights_key, lambda: (self.get_criterion_weights(),)
+        )
+
+    def __build_top_cutoff(self, k):
+        """Computes the criterion weights, and the score and the row of the k-th
+        preferred item in the order of the score index (by decreasing score, then by
+        row)."""
+        (weights,) = self.__get_weights()
+        scores = self.__value_matrix.get_values() @ weights
+        cutoff_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+        tied_rows = np.flatnonzero(scores == cutoff_score)
+        cutoff_row = tied_rows[k - np.count_nonzero(scores > cutoff_score) - 1]
+        return (weights, np.array([cutoff_score]), np.array([cutoff_row]))
+
+    def __build_first_better_items(self):
+        """Computes, for each column of the value matrix, the values of the column
+        and the most preferred item with each value or a greater one (as the values
+        and rows arrays of ValueMatrix.get_first_better_rows, one couple per column)."""
+        _, _, ranks = self.__build_score_index()
+        tables = []
+        for criterion_name in self.__value_matrix.get_criterion_names():
+            tables.extend(
+                self.__value_matrix.get_first_better_rows(criterion_name, ranks)
+            )
+        return tuple(tables)
+
+    def __get_score_index(self):
+        """Returns the scores, the order and the ranks of the items for the criterion
+        name list, shared with the preferences using the same matrix and list."""
+        return self.__value_matrix.get_shared_index(
+            self.__score_index_key, self.__build_score_index
+        )
+
+    def __build_score_index(self):
+        """Computes the scores, the order and the ranks of the items."""
+        scores = self.score_items()
+        order = np.argsort(-scores, kind="stable")
+        ranks = np.empty_like(order)
+        ranks[order] = np.arange(len(order))
+        return (scores, order, ranks)
 
 
 if __name__ == "__main__":
@@ -80,27 +326,11 @@ if __name__ == "__main__":
     preferences = Preferences()
 
     # Read the dataset
-    dataset = pd.read_csv(DATASET_PATH, sep=";")
-
+    items = load_dataset(DATASET_PATH, preferences)
     preferences.set_criterion_name_list(
-        [criterion_find(column) for column in dataset.columns if column != "WEAPON"]
+        list(preferences.get_value_matrix().get_criterion_names())
     )
 
-    # Add values
-    items = []
-    for _, row in dataset.iterrows():
-        new_item = Item(row["WEAPON"], "")
-        items.append(new_item)
-        for column in dataset.columns:
-            if column != "WEAPON":
-                preferences.add_criterion_value(
-                    CriterionValue(
-                        new_item,
-                        criterion_find(column),
-                        row[column],
-                    )
-                )
-
     print(items[0])
     print(items[1])
     print(items[0].get_value(preferences, criterion_find("PRICE")))
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+
+import copy
+import numbers
+from collections import OrderedDict
+
+import numpy as np
+
+from communication.preferences.CriterionValue import CriterionValue
+from communication.preferences.Value import Value
+
+SHARED_INDEX_CACHE_BYTES = 64 * 2**20
+
+
+class ValueMatrix:
+    """ValueMatrix class.
+    This class implements a dense item x criterion storage of criterion values.
+
+    Each item is mapped to a row and each criterion name to a column, so that reading
+    the value of an item on a criterion is a direct index in a NumPy array.
+
+    attr:
+        item_rows: the row of each item (dict)
+        criterion_columns: the column of each criterion name (dict)
+        values: the item x criterion values (numpy.ndarray)
+        mask: whether a value has been set for an item x criterion cell (numpy.ndarray)
+        version: a counter incremented each time a value is set (int)
+        criterion_indexes: for each column, the rows sorted by value (built lazily)
+        read_only: whether the values can still be set (a frozen matrix can be shared
+            by the preferences of many agents)
+        shared_indexes: the derived indexes (e.g. scores of the items for a criterion
+            ordering) shared by the preferences using the matrix, least recently used
+            ones first
+        shared: whether the storage is shared with a copy of the matrix, and must be
+            copied before being written (copy-on-write)
+    """
+
+    def __init__(self, capacity=16):
+        """Creates a new ValueMatrix."""
+        self.__items = []
+        self.__item_rows = {}
+        self.__criterion_names = []
+        self.__criterion_columns = {}
+        self.__values = np.zeros((capacity, 0), dtype=np.int64)
+        self.__mask = np.zeros((capacity, 0), dtype=bool)
+        self.__version = 0
+        self.__criterion_indexes = {}
+        self.__read_only = False
+        self.__shared_indexes = OrderedDict()
+        self.__shared_indexes_version = 0
+        self.__shared_indexes_bytes = 0
+        self.__shared = False
+
+    def __len__(self):
+        """Returns the number of items stored in the matrix."""
+        return len(self.__items)
+
+    def __deepcopy__(self, memo):
+        """Returns a copy of the matrix sharing its storage until one of them is
+        written (copy-on-write), so that copying does not depend on the size of the
+        matrix."""
+        value_matrix = copy.copy(self)
+        memo[id(self)] = value_matrix
+        value_matrix.__criterion_indexes = dict(self.__criterion_indexes)
+        value_matrix.__shared_indexes = OrderedDict(self.__shared_indexes)
+        self.__shared = True
+        value_matrix.__shared = True
+        return value_matrix
+
+    def get_version(self):
+        """Returns the version of the matrix, incremented each time a value is set."""
+        return self.__version
+
+    def freeze(self):
+        """Makes the matrix read-only, so that it can be shared by many preferences."""
+        self.__read_only = True
+        self.__values.flags.writeable = False
+        self.__mask.flags.writeable = False
+
+    def is_read_only(self):
+        """Returns whether the matrix has been frozen."""
+        return self.__read_only
+
+    def get_items(self):
+        """Returns the items, ordered by row."""
+        return self.__items
+
+    def get_criterion_names(self):
+        """Returns the criterion names, ordered by column."""
+        return self.__criterion_names
+
+    def get_row(self, item):
+        """Returns the row of an item, or None if the item is unknown."""
+        return self.__item_rows.get(item)
+
+    def get_column(self, criterion_name):
+        """Returns the column of a criterion name, or None if the criterion is unknown."""
+        return self.__criterion_columns.get(criterion_name)
+
+    def get_values(self):
+        """Returns the item x criterion values of the stored items."""
+        return self.__values[: len(self.__items)]
+
+    def get_mask(self):
+        """Returns the item x criterion mask of the values which have been set."""
+        return self.__mask[: len(self.__items)]
+
+    def add_item(self, item):
+        """Adds an item to the matrix (if needed) and returns its row."""
+        row = self.__item_rows.get(item)
+        if row is None:
+            self.__check_writable()
+            self.__unshare()
+            row = len(self.__items)
+            if row == self.__values.shape[0]:
+                self.__resize(max(2 * row, 16), self.__values.shape[1])
+            self.__items.append(item)
+            self.__item_rows[item] = row
+        return row
+
+    def reserve(self, rows):
+        """Grows the storage to hold at least the given number of items, so that adding
+        them (e.g. block by block) does not copy the values again."""
+        if rows > self.__values.shape[0]:
+            self.__check_writable()
+            self.__unshare()
+            self.__resize(rows, self.__values.shape[1])
+
+    def add_criterion_name(self, criterion_name):
+        """Adds a criterion name to the matrix (if needed) and returns its column."""
+        column = self.__criterion_columns.get(criterion_name)
+        if column is None:
+            self.__check_writable()
+            self.__unshare()
+            column = len(self.__criterion_names)
+            self.__resize(self.__values.shape[0], column + 1)
+            self.__criterion_names.append(criterion_name)
+            self.__criterion_columns[criterion_name] = column
+        return column
+
+    def set_value(self, item, criterion_name, value):
+        """Sets the value for a given item and a given criterion name (a number, or a
+        Value stored as its number)."""
+        value = _to_number(value)
+        self.__check_writable()
+        self.__unshare()
+        row = self.add_item(item)
+        column = self.add_criterion_name(criterion_name)
+        if self.__values.dtype.kind == "i" and value != int(value):
+            self.__values = self.__values.astype(np.float64)
+        self.__values[row, column] = value
+        self.__mask[row, column] = True
+        self.__version += 1
+        self.__criterion_indexes.pop(column, None)
+
+    def set_values(self, items, criterion_names, values):
+        """Sets a block of values at once.
+
+        :param items: the N items of the block (one per row of values)
+        :param criterion_names: the C criterion names of the block (one per column of values)
+        :param values: an N x C array of values (numbers, or Value members)
+        """
+        self.__check_writable()
+        self.__unshare()
+        values = np.asarray(values)
+        if values.dtype == object:
+            values = np.array(
+                [_to_number(value) for value in values.ravel().tolist()]
+            ).reshape(values.shape)
+        columns = [self.add_criterion_name(name) for name in criterion_names]
+        start = len(self.__items)
+        if len(set(items)) == len(items) and self.__item_rows.keys().isdisjoint(items):
+            # New items only: append them as a contiguous block of rows
+            stop = start + len(items)
+            if stop > self.__values.shape[0]:
+                self.__resize(max(stop, 2 * start), self.__values.shape[1])
+            self.__items.extend(items)
+            self.__item_rows.update(zip(items, range(start, stop)))
+            cells = (slice(start, stop), columns)
+        else:
+            cells = np.ix_([self.add_item(item) for item in items], columns)
+        if self.__values.dtype.kind == "i" and values.dtype.kind not in "iub":
+            self.__values = self.__values.astype(np.float64)
+        self.__values[cells] = values
+        self.__mask[cells] = True
+        self.__version += 1
+        self.__criterion_indexes.clear()
+
+    def get_value(self, item, criterion_name):
+        """Gets the value for a given item and a given criterion name (None if not set)."""
+        row = self.__item_rows.get(item)
+        column = self.__criterion_columns.get(criterion_name)
+        if row is None or column is None or not self.__mask[row, column]:
+            return None
+        return self.__values[row, column].item()
+
+    def get_items_better_than(self, criterion_name, value):
+        """Returns the items with a value greater than the given one on a criterion,
+        ordered by increasing value."""
+        index = self.__get_criterion_index(criterion_name)
+        if index is None:
+            return []
+        sorted_values, sorted_rows = index
+        start = np.searchsorted(sorted_values, value, side="right")
+        return [self.__items[row] for row in sorted_rows[start:]]
+
+    def get_first_better_rows(self, criterion_name, ranks):
+        """Returns the distinct values set for a criterion, in increasing order, and
+        for each of them the row with the lowest rank among the rows with this value
+        or a greater one: the first row (in order of rank) with a value greater than v
+        is rows[numpy.searchsorted(values, v, side="right")], if there is one.
+
+        :param ranks: the rank of each row (a permutation of the rows, e.g. the order
+        of preference of an agent)
+        :return: a tuple of two arrays (values, rows), or None if the criterion is
+        unknown
+        """
+        index = self.__get_criterion_index(criterion_name)
+        if index is None:
+            return None
+        sorted_values, sorted_rows = index
+        if len(sorted_values) == 0:
+            return sorted_values, sorted_rows
+        starts = np.flatnonzero(
+            np.concatenate(([True], sorted_values[1:] != sorted_values[:-1]))
+        )
+        suffix_min_ranks = np.minimum.accumulate(
+            np.minimum.reduceat(ranks[sorted_rows], starts)[::-1]
+        )[::-1]
+        rows_by_rank = np.empty_like(ranks)
+        rows_by_rank[ranks] = np.arange(len(ranks))
+        return sorted_values[starts], rows_by_rank[suffix_min_ranks]
+
+    def get_next_better_item(self, criterion_name, value):
+        """Returns the item with the smallest value greater than the given one on a
+        criterion (the first by row in case of a tie), or None if there is none."""
+        index = self.__get_criterion_index(criterion_name)
+        if index is None:
+            return None
+        sorted_values, sorted_rows = index
+        start = np.searchsorted(sorted_values, value, side="right")
+        if start == len(sorted_values):
+            return None
+        return self.__items[sorted_rows[start]]
+
+    def get_best_item(self, criterion_name):
+        """Returns the item with the greatest value on a criterion (the first by row
+        in case of a tie), or None if no value is set for this criterion."""
+        index = self.__get_criterion_index(criterion_name)
+        if index is None or len(index[0]) == 0:
+            return None
+        sorted_values, sorted_rows = index
+        start = np.searchsorted(sorted_values, sorted_values[-1], side="left")
+        return self.__items[sorted_rows[start]]
+
+    def get_criterion_value_list(self):
+        """Returns the list of criterion values stored in the matrix, ordered by row."""
+        criterion_value_list = []
+        for row, column in zip(*np.nonzero(self.get_mask())):
+            criterion_value_list.append(
+                CriterionValue(
+                    self.__items[row],
+                    self.__criterion_names[column],
+                    self.__values[row, column].item(),
+                )
+            )
+        return criterion_value_list
+
+    def get_shared_index(self, key, build):
+        """Returns the index stored under a key, building it with build() if it is
+        missing or if a value changed since it was built.
+
+        An index is a tuple of numpy arrays. The least recently used indexes are dropped
+        once they take more than SHARED_INDEX_CACHE_BYTES, so that the memory used by
+        the indexes does not grow with the number of preferences sharing the matrix.
+        """
+        if self.__shared_indexes_version != self.__version:
+            self.__shared_indexes.clear()
+            self.__shared_indexes_version = self.__version
+            self.__shared_indexes_bytes = 0
+        index = self.__shared_indexes.get(key)
+        if index is None:
+            index = build()
+            self.__shared_indexes[key] = index
+            self.__shared_indexes_bytes += sum(array.nbytes for array in index)
+            while (
+                self.__shared_indexes_bytes > SHARED_INDEX_CACHE_BYTES
+                and len(self.__shared_indexes) > 1
+            ):
+                _, dropped_index = self.__shared_indexes.popitem(last=False)
+                self.__shared_indexes_bytes -= sum(
+                    array.nbytes for array in dropped_index
+                )
+        else:
+            self.__shared_indexes.move_to_end(key)
+        return index
+
+    def __check_writable(self):
+        """Raises a ValueError if the matrix has been frozen."""
+        if self.__read_only:
+            raise ValueError("The value matrix is read-only")
+
+    def __unshare(self):
+        """Copies the storage shared with a copy of the matrix before writing it."""
+        if self.__shared:
+            self.__items = list(self.__items)
+            self.__item_rows = dict(self.__item_rows)
+            self.__criterion_names = list(self.__criterion_names)
+            self.__criterion_columns = dict(self.__criterion_columns)
+            self.__values = self.__values.copy()
+            self.__mask = self.__mask.copy()
+            self.__shared = False
+
+    def __get_criterion_index(self, criterion_name):
+        """Returns the sorted values and the rows sorted by (value, row) for a
+        criterion, rebuilding them if a value changed."""
+        column = self.__criterion_columns.get(criterion_name)
+        if column is None:
+            return None
+        index = self.__criterion_indexes.get(column)
+        if index is None:
+            rows = np.flatnonzero(self.get_mask()[:, column])
+            values = self.__values[rows, column]
+            order = np.argsort(values, kind="stable")
+            index = (values[order], rows[order])
+            self.__criterion_indexes[column] = index
+        return index
+
+    def __resize(self, rows, columns):
+        """Grows the underlying arrays to the given number of rows and columns."""
+        old_rows, old_columns = self.__values.shape
+        values = np.zeros((rows, columns), dtype=self.__values.dtype)
+        mask = np.zeros((rows, columns), dtype=bool)
+        values[:old_rows, :old_columns] = self.__values
+        mask[:old_rows, :old_columns] = self.__mask
+        self.__values = values
+        self.__mask = mask
+
+
+def _to_number(value):
+    """Returns the number of a Value member, or the value itself if it is a number."""
+    if isinstance(value, Value):
+        return value.value
+    if not isinstance(value, numbers.Real):
+        raise TypeError(f"Criterion values must be numbers or Value members: {value!r}")
+    return value
@@ -3,14 +3,41 @@
 Testing all the functionalities of the communication package.
 """
 
+import asyncio
+import copy
+import gc
+import os
+import tempfile
+import threading
+import weakref
+
+import numpy as np
 from mesa import Model
 from mesa.time import RandomActivation
 
+from arguments.argument import Argument
+from arguments.couplevalue import CoupleValue
 from communication.agent.CommunicatingAgent import CommunicatingAgent
+from communication.agent.MessageActivation import MessageActivation
+from communication.mailbox.AsyncMailbox import AsyncMailbox
 from communication.mailbox.Mailbox import Mailbox
 from communication.message.Message import Message
 from communication.message.MessagePerformative import MessagePerformative
 from communication.message.MessageService import MessageService
+from communication.message.MessageTransport import (
+    LocalBroker,
+    SocketBroker,
+    run_partitions,
+)
+from communication.message.PartitionedMessageService import (
+    PartitionedMessageService,
+)
+from communication.preferences.CatalogGenerator import write_catalog
+from communication.preferences.CriterionValue import CriterionValue
+from communication.preferences.DatasetLoader import CACHE_VALUES_SUFFIX, load_dataset
+from communication.preferences.Item import Item
+from communication.preferences.Preferences import Preferences
+from communication.preferences.Value import Value
 
 
 class TestAgent(CommunicatingAgent):
@@ -18,9 +45,11 @@ class TestAgent(CommunicatingAgent):
 
     def __init__(self, unique_id, model, name):
         super().__init__(unique_id, model, name)
+        self.steps = 0
 
     def step(self):
         super().step()
+        self.steps += 1
 
 
 class TestModel(Model):
@@ -39,6 +68,54 @@ class TestModel(Model):
         self.schedule.step()
 
 
+class PartitionModel(Model):
+    """PartitionModel holding the agents of one partition of a ring of 4 agents."""
+
+    def __init__(self, transport, partition, n_partitions):
+        super().__init__()
+        self.schedule = RandomActivation(self)
+        self.message_service = PartitionedMessageService(
+            self.schedule,
+            transport,
+            partition,
+            n_partitions,
+            {"Agent" + str(i): i % n_partitions for i in range(4)},
+            instant_delivery=False,
+        )
+        for i in range(partition, 4, n_partitions):
+            self.schedule.add(TestAgent(i, self, "Agent" + str(i)))
+
+    def step(self):
+        self.message_service.dispatch_messages()
+        self.schedule.step()
+
+
+def run_ring_partition(transport, partition, n_partitions):
+    """Send a message to the next agent of the ring at each of 3 steps, and return
+    the contents received by each agent of the partition after each step."""
+    model = PartitionModel(transport, partition, n_partitions)
+    received = {agent.get_name(): [] for agent in model.schedule.agents}
+    for step in range(3):
+        for agent in model.schedule.agents:
+            next_agent = "Agent" + str((agent.unique_id + 1) % 4)
+            agent.send_message(
+                Message(agent.get_name(), next_agent, MessagePerformative.PROPOSE, step)
+            )
+        for agent in model.schedule.agents:
+            received[agent.get_name()].append(
+                [message.get_content() for message in agent.get_new_messages()]
+            )
+        model.step()
+    return received
+
+
+def run_dying_partition(transport, partition, n_partitions):
+    """Run a partition of the ring, except for partition 1 whose process dies."""
+    if partition == 1:
+        os._exit(1)
+    return run_ring_partition(transport, partition, n_partitions)
+
+
 if __name__ == "__main__":
     print("*---- Testing communication package ----")
     print("*")
@@ -65,6 +142,60 @@ if __name__ == "__main__":
     assert len(mailbox.get_messages_from_performative(MessagePerformative.PROPOSE)) == 1
     assert len(mailbox.get_messages_from_performative(MessagePerformative.ARGUE)) == 1
     print("*     get_messages_from_performative() => OK")
+    assert mailbox.has_message_from(MessagePerformative.ACCEPT, "Agent1")
+    assert not mailbox.has_message_from(MessagePerformative.ACCEPT, "Agent2")
+    print("*     has_message_from() => OK")
+
+    bounded_mailbox = Mailbox(max_read_messages=2)
+    for message in (m1, m2, m3):
+        bounded_mailbox.receive_messages(message)
+    assert len(bounded_mailbox.get_messages()) == 2
+    assert len(bounded_mailbox.get_messages_from_performative(MessagePerformative.PROPOSE)) == 0
+    assert not bounded_mailbox.has_message_from(MessagePerformative.PROPOSE, "Agent1")
+    assert len(bounded_mailbox.get_messages_from_exp("Agent1")) == 1
+    filtered_mailbox = Mailbox(kept_performatives=[MessagePerformative.ARGUE])
+    for message in (m1, m2, m3):
+        filtered_mailbox.receive_messages(message)
+    assert len(filtered_mailbox.get_new_messages()) == 3
+    assert len(filtered_mailbox.get_messages()) == 1
+    print("*     Mailbox retention policies => OK")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for _ in range(2):
+            archived_mailbox = Mailbox(
+                max_read_messages=1, archive_path=os.path.join(directory, "archive")
+            )
+            for message in (m1, m2, m3):
+                archived_mailbox.receive_messages(message)
+            archived_mailbox.get_new_messages()
+            contents = [m.get_content() for m in archived_mailbox.get_messages()]
+            assert contents == ["Bonjour", "Hello", "Buenos Dias"]
+        print("*     Mailbox archive => OK")
+
+        archived_mailbox = Mailbox(
+            max_read_messages=1, archive_path=os.path.join(directory, "archive")
+        )
+        for message in (m1, m2):
+            archived_mailbox.receive_messages(message)
+            archived_mailbox.get_new_messages()
+        forked_mailbox = copy.deepcopy(archived_mailbox)
+        archived_mailbox.receive_messages(m3)
+        forked_mailbox.receive_messages(m1)
+        contents = [m.get_content() for m in archived_mailbox.get_messages()]
+        forked_contents = [m.get_content() for m in forked_mailbox.get_messages()]
+        assert contents == ["Bonjour", "Hello", "Buenos Dias"]
+        assert forked_contents == ["Bonjour", "Hello", "Bonjour"]
+        # The archive of the copy is deleted with it
+        assert len(os.listdir(directory)) == 2
+        del forked_mailbox
+        gc.collect()
+        assert os.listdir(directory) == ["archive"]
+    print("*     copies of a Mailbox with an archive => OK")
+
+    async_mailbox = AsyncMailbox()
+    async_mailbox.receive_messages(m1)
+    assert len(asyncio.run(async_mailbox.wait_new_messages())) == 1
+    print("*     AsyncMailbox wait_new_messages() => OK")
 
     print("* 2) Testing CommunicatingAgent & MessageService")
 
@@ -96,6 +227,16 @@ if __name__ == "__main__":
     assert len(agent1.get_messages()) == 2
     print("*     send_message() & dispatch_message (instant delivery) => OK")
 
+    assert MessageService.get_instance().find_agent_from_name("Agent1") is agent1
+    try:
+        agent0.send_message(
+            Message("Agent0", "Agent2", MessagePerformative.COMMIT, "Bonjour")
+        )
+        assert False
+    except ValueError:
+        pass
+    print("*     find_agent_from_name() => OK")
+
     MessageService.get_instance().set_instant_delivery(False)
 
     agent0.send_message(
@@ -118,3 +259,221 @@ if __name__ == "__main__":
     assert len(agent0.get_messages()) == 2
     assert len(agent1.get_messages()) == 4
     print("*     send_message() & dispatch_messages => OK")
+
+    other_model = TestModel()
+    other_agent0 = other_model.schedule.agents[0]
+    assert MessageService.get_instance(other_model) is not MessageService.get_instance(
+        communicating_model
+    )
+    other_agent0.send_message(
+        Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Bonjour")
+    )
+    assert len(other_model.schedule.agents[1].get_new_messages()) == 1
+    assert len(agent1.get_new_messages()) == 0
+    print("*     one MessageService per model => OK")
+
+    dropped_models = [TestModel() for _ in range(5)]
+    references = [weakref.ref(dropped_model) for dropped_model in dropped_models]
+    del dropped_models
+    # The default message service keeps the last created model
+    last_model = TestModel()
+    gc.collect()
+    assert all(reference() is None for reference in references)
+    assert MessageService.get_instance() is MessageService.get_instance(last_model)
+    print("*     dropped models are collected => OK")
+
+    old_agent1 = other_model.schedule.agents[1]
+    other_model.schedule.remove(old_agent1)
+    try:
+        other_agent0.send_message(
+            Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Bonjour")
+        )
+        assert False
+    except ValueError:
+        pass
+    new_agent1 = TestAgent(2, other_model, "Agent1")
+    other_model.schedule.add(new_agent1)
+    other_agent0.send_message(
+        Message("Agent0", "Agent1", MessagePerformative.COMMIT, "Bonjour")
+    )
+    assert len(new_agent1.get_new_messages()) == 1
+    assert len(old_agent1.get_new_messages()) == 0
+    other_model.schedule.remove(new_agent1)
+    other_model.schedule.add(old_agent1)
+    assert (
+        MessageService.get_instance(other_model).find_agent_from_name("Agent1")
+        is old_agent1
+    )
+    print("*     agents removed from or added to the schedule => OK")
+
+    message_driven_model = TestModel()
+    message_driven_model.schedule = MessageActivation(message_driven_model)
+    message_service = MessageService(
+        message_driven_model.schedule, instant_delivery=False
+    )
+    for i in range(3):
+        message_driven_model.schedule.add(
+            TestAgent(i, message_driven_model, "Agent" + str(i))
+        )
+    message_service.send_message(
+        Message("Agent0", "Agent2", MessagePerformative.PROPOSE, "Bonjour")
+    )
+    message_service.dispatch_messages()
+    assert message_driven_model.schedule.get_ready_count() == 1
+    message_driven_model.schedule.step()
+    agents = message_driven_model.schedule.agents
+    assert [agent.steps for agent in agents] == [0, 0, 1]
+    message_driven_model.schedule.step()
+    assert [agent.steps for agent in agents] == [0, 0, 1]
+    print("*     MessageActivation only activates agents with messages => OK")
+
+    print("* 3) Testing PartitionedMessageService")
+
+    broker = LocalBroker(2)
+    thread_results = [None, None]
+    threads = [
+        threading.Thread(
+            target=lambda p: thread_results.__setitem__(
+                p, run_ring_partition(broker.get_transport(p), p, 2)
+            ),
+            args=(p,),
+        )
+        for p in range(2)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = {"Agent" + str(i): [[], [0], [1]] for i in range(4)}
+    assert {**thread_results[0], **thread_results[1]} == expected
+    assert set(thread_results[0]) == {"Agent0", "Agent2"}
+    print("*     step barrier with a local broker => OK")
+
+    for transport in ("queue", "socket"):
+        process_results = run_partitions(run_ring_partition, 2, transport=transport)
+        assert {**process_results[0], **process_results[1]} == expected
+        print("*     worker processes over " + transport + " transport => OK")
+
+    for transport in ("queue", "socket"):
+        try:
+            run_partitions(run_dying_partition, 2, transport=transport)
+            assert False
+        except RuntimeError as error:
+            assert "Partition 1 exited with code 1" in str(error)
+    print("*     worker process exiting without a result => OK")
+
+    lonely_broker = SocketBroker(2, connect_timeout=0.2)
+    lonely_transport = lonely_broker.get_transport(0)
+    lonely_broker.start()
+    try:
+        lonely_transport.receive()
+        assert False
+    except EOFError:
+        pass
+    try:
+        lonely_broker.join()
+        assert False
+    except RuntimeError:
+        pass
+    lonely_transport.close()
+    print("*     partition not connecting to a SocketBroker => OK")
+
+    print("* 4) Testing Preferences")
+
+    item0 = Item("Item0", "")
+    item1 = Item("Item1", "")
+    preferences = Preferences()
+    preferences.set_criterion_name_list([0, 1])
+    preferences.add_criterion_value(CriterionValue(item0, 0, Value.GOOD))
+    preferences.add_criterion_value(CriterionValue(item0, 1, 7))
+    preferences.add_criterion_values([item1], [0, 1], [[Value.VERY_BAD, Value.BAD]])
+    assert preferences.get_value(item0, 0) == 3
+    assert preferences.get_value(item1, 1) == 1
+    assert preferences.get_score(item0) == 3 * 100 + 7 * 50
+    try:
+        preferences.add_criterion_value(CriterionValue(item0, 0, "GOOD"))
+        assert False
+    except TypeError:
+        pass
+    print("*     Value members as criterion values => OK")
+
+    premises_preferences = Preferences()
+    premises_preferences.set_criterion_name_list([2, 0, 1])
+    premises_preferences.add_criterion_values(
+        [item0, item1], [0, 1, 2], [[5, 2, 8], [4, 9, 1]]
+    )
+    argument = Argument(True, item0)
+    assert argument.list_supporting_proposal(item0, premises_preferences) == [
+        CoupleValue(2, 8),
+        CoupleValue(0, 5),
+    ]
+    assert argument.list_attacking_proposal(item0, premises_preferences) == [
+        CoupleValue(1, 2)
+    ]
+    assert premises_preferences.get_premises(item1) == (
+        (CoupleValue(1, 9),),
+        (CoupleValue(2, 1), CoupleValue(0, 4)),
+    )
+    print("*     premises for and against an item => OK")
+
+    premises_preferences.set_criterion_name_list([1, 0, 2])
+    assert argument.list_supporting_proposal(item0, premises_preferences) == [
+        CoupleValue(0, 5),
+        CoupleValue(2, 8),
+    ]
+    assert argument.list_attacking_proposal(item1, premises_preferences) == [
+        CoupleValue(0, 4),
+        CoupleValue(2, 1),
+    ]
+    copied_preferences = copy.deepcopy(premises_preferences)
+    copied_preferences.add_criterion_value(CriterionValue(item0, 1, 6))
+    assert argument.list_supporting_proposal(item0, copied_preferences) == [
+        CoupleValue(1, 6),
+        CoupleValue(0, 5),
+        CoupleValue(2, 8),
+    ]
+    assert argument.list_attacking_proposal(item0, copied_preferences) == []
+    assert argument.list_attacking_proposal(item0, premises_preferences) == [
+        CoupleValue(1, 2)
+    ]
+    premises_preferences.add_criterion_value(CriterionValue(item0, 2, 3))
+    assert argument.list_attacking_proposal(item0, premises_preferences) == [
+        CoupleValue(1, 2),
+        CoupleValue(2, 3),
+    ]
+    print("*     premises after a criterion name list or a value change => OK")
+
+    item2 = Item("Item2", "")
+    better_preferences = Preferences()
+    better_preferences.set_criterion_name_list([0, 1])
+    better_preferences.add_criterion_values(
+        [item0, item1, item2], [0, 1], [[1, 1], [3, 2], [2, 9]]
+    )
+    # Item2 is better than Item1 in the order of preference, Item1 comes first by row
+    assert better_preferences.get_first_better_item(0, 1) is item2
+    assert better_preferences.get_first_better_item(0, 2) is item1
+    assert better_preferences.get_first_better_item(0, 3) is None
+    better_preferences.set_criterion_name_list([1, 0])
+    assert better_preferences.get_first_better_item(0, 1) is item2
+    better_preferences.add_criterion_value(CriterionValue(item1, 1, 10))
+    assert better_preferences.get_first_better_item(0, 1) is item1
+    print("*     first better item in the order of preference => OK")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "catalog.csv")
+        write_catalog(path, 100, seed=1)
+        load_dataset(path, Preferences())
+        cached_values = np.load(path + CACHE_VALUES_SUFFIX, mmap_mode="r")
+        old_values = np.array(cached_values)
+        # A new version of the dataset replaces the cache mapped by another reader
+        write_catalog(path, 100, seed=2)
+        preferences = Preferences()
+        load_dataset(path, preferences)
+        assert (cached_values == old_values).all()
+        assert not (preferences.get_value_matrix().get_values() == old_values).all()
+        assert sorted(os.listdir(directory)) == [
+            "catalog.csv",
+            "catalog.csv.cache.json",
+            "catalog.csv.cache.npy",
+        ]
+    print("*     dataset cache replaced under its readers => OK")
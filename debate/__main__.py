@@ -0,0 +1,5 @@
+""" Runs a debate between two agents: python -m debate --help """
+
+from debate.cli import main
+
+main()
@@ -0,0 +1,160 @@
+""" Runs many debates in parallel and aggregates their outcomes """
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from communication.message.MessagePerformative import MessagePerformative
+from communication.preferences.DatasetLoader import DATASET_PATH, load_dataset
+from communication.preferences.Preferences import Preferences
+from debate.events import NullEventSink
+from debate.fastforward import FastForwardDebate
+
+
+def run_debate(seed, max_steps=20, dataset_path=DATASET_PATH, value_matrix=None):
+    """Run a single silent debate and return its outcome.
+
+    : param seed : int - seed of the random generator of the model
+    : param value_matrix : ValueMatrix - the dataset already loaded (read from
+    dataset_path if None)
+    : return : tuple - (seed, committed item name or None, number of steps,
+    number of messages for each MessagePerformative)
+    """
+    # Imported here, so that fast-forward workers do not load mesa
+    from debate.model import ArgumentModel
+
+    model = ArgumentModel(
+        dataset_path=dataset_path,
+        event_sink=NullEventSink(),
+        seed=seed,
+        value_matrix=value_matrix,
+    )
+    model.run(max_steps)
+    committed_item = model.committed_item
+    return (
+        seed,
+        None if committed_item is None else committed_item.get_name(),
+        model.steps,
+        tuple(
+            model.message_counts[performative] for performative in MessagePerformative
+        ),
+    )
+
+
+# Fast-forward engines and loaded datasets of the worker process, by dataset path
+_engines = {}
+_value_matrices = {}
+
+
+def _run_debates(seeds, max_steps, dataset_path, fast_forward=False):
+    """Run the debates of a chunk of seeds in a worker process, loading the dataset
+    once per process. A debate which fails gets an outcome without commitment nor
+    steps, with the error, instead of failing the chunk."""
+    if fast_forward:
+        engine = _engines.get(dataset_path)
+        if engine is None:
+            engine = _engines[dataset_path] = FastForwardDebate(dataset_path)
+        run = engine.run
+    else:
+        value_matrix = _value_matrices.get(dataset_path)
+        if value_matrix is None:
+            preferences = Preferences()
+            load_dataset(dataset_path, preferences)
+            value_matrix = preferences.get_value_matrix()
+            value_matrix.freeze()
+            _value_matrices[dataset_path] = value_matrix
+
+        def run(seed, max_steps):
+            return run_debate(seed, max_steps, dataset_path, value_matrix)
+
+    outcomes = []
+    for seed in seeds:
+        try:
+            outcomes.append(run(seed, max_steps) + (None,))
+        except Exception as error:
+            outcomes.append(
+                (
+                    seed,
+                    None,
+                    0,
+                    (0,) * len(MessagePerformative),
+                    f"{type(error).__name__}: {error}",
+                )
+            )
+    return outcomes
+
+
+def run_batch(
+    n_runs,
+    seed=0,
+    max_steps=20,
+    dataset_path=DATASET_PATH,
+    processes=None,
+    chunksize=64,
+    fast_forward=False,
+):
+    """Run n_runs independent debates over a pool of processes.
+
+    Each debate gets its own seed, drawn from a numpy SeedSequence built from the given
+    seed, so that a batch is reproducible whatever the number of processes.
+
+    : param processes : int - number of worker processes (all the cores if None, the
+    current process if 0)
+    : param fast_forward : bool - play the debates with FastForwardDebate, which gives
+    the same outcomes without messages nor scheduler
+    : return : DataFrame - one row per debate, with its seed, the committed item
+    (None if no commitment was reached), the number of steps, one message count
+    column per performative and the error which stopped the debate (None if it ran
+    normally)
+    """
+    import pandas as pd
+
+    seed_sequence = np.random.SeedSequence(seed)
+    seeds = [int(s) for s in seed_sequence.generate_state(n_runs, np.uint64)]
+    chunks = [seeds[i : i + chunksize] for i in range(0, n_runs, chunksize)]
+    if processes == 0:
+        results = [
+            _run_debates(chunk, max_steps, dataset_path, fast_forward)
+            for chunk in chunks
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            results = list(
+                executor.map(
+                    _run_debates,
+                    chunks,
+                    [max_steps] * len(chunks),
+                    [dataset_path] * len(chunks),
+                    [fast_forward] * len(chunks),
+                )
+            )
+    outcomes = [outcome for chunk_results in results for outcome in chunk_results]
+
+    table = pd.DataFrame(
+        {
+            "seed": np.array([outcome[0] for outcome in outcomes], dtype=np.uint64),
+            "committed_item": pd.Categorical([outcome[1] for outcome in outcomes]),
+            "steps": np.array([outcome[2] for outcome in outcomes], dtype=np.int32),
+        }
+    )
+    message_counts = np.array(
+        [outcome[3] for outcome in outcomes], dtype=np.int32
+    ).reshape(len(outcomes), len(MessagePerformative))
+    for column, performative in enumerate(MessagePerformative):
+        table[performative.name] = message_counts[:, column]
+    table["error"] = pd.Series([outcome[4] for outcome in outcomes], dtype=object)
+    return table
+
+
+def summarize_batch(table):
+    """Return summary statistics of a batch of debates.
+
+    : param table : DataFrame - the outcomes returned by run_batch
+    : return : tuple - (DataFrame of statistics of the steps and message counts,
+    Series of the share of debates committed on each item, NaN standing for the
+    debates without commitment), both over the debates which did not fail
+    """
+    table = table[table["error"].isna()]
+    statistics = table.drop(columns=["seed", "committed_item", "error"]).describe()
+    item_shares = table["committed_item"].value_counts(normalize=True, dropna=False)
+    return statistics, item_shares
@@ -0,0 +1,93 @@
+""" Command line interface running a debate between two agents """
+
+import argparse
+
+MAX_STEPS = 20
+SINKS = ("console", "jsonl", "null")
+
+
+def parse_arguments(argv=None):
+    """Parse the command line options (sys.argv if argv is None)."""
+    parser = argparse.ArgumentParser(
+        prog="python -m debate", description="Run a debate between two agents."
+    )
+    parser.add_argument(
+        "--dataset",
+        help="';'-separated dataset of the items (default: weapons_dataset.csv)",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=MAX_STEPS,
+        help="maximum number of steps of the debate",
+    )
+    parser.add_argument("--seed", type=int, help="seed of the random generator")
+    parser.add_argument(
+        "--sink",
+        choices=SINKS,
+        default="console",
+        help="where the events of the debate go: printed, written as JSON lines to "
+        "--output, or discarded",
+    )
+    parser.add_argument("--output", help="file of the jsonl sink")
+    parser.add_argument(
+        "--fast-forward",
+        action="store_true",
+        help="only compute the outcome, without messages nor mesa scheduler (no "
+        "events are sent to the sink)",
+    )
+    arguments = parser.parse_args(argv)
+    if arguments.sink == "jsonl" and arguments.output is None:
+        parser.error("--sink jsonl requires --output")
+    return arguments
+
+
+def make_event_sink(sink, output=None):
+    """Return the event sink of the given name."""
+    from debate.events import ConsoleEventSink, JsonLinesEventSink, NullEventSink
+
+    if sink == "console":
+        return ConsoleEventSink()
+    if sink == "jsonl":
+        return JsonLinesEventSink(output)
+    return NullEventSink()
+
+
+def run(arguments):
+    """Run the debate described by the parsed options and return its outcome: the
+    name of the committed item (None if no commitment was reached) and the number
+    of steps."""
+    # The engines are imported once the options are valid, so that --help and
+    # option errors do not pay for loading numpy, pandas or mesa
+    from communication.preferences.DatasetLoader import DATASET_PATH
+
+    dataset_path = DATASET_PATH if arguments.dataset is None else arguments.dataset
+    if arguments.fast_forward:
+        from debate.fastforward import FastForwardDebate
+
+        engine = FastForwardDebate(dataset_path)
+        _, committed_item, steps, _ = engine.run(arguments.seed, arguments.max_steps)
+        return committed_item, steps
+
+    from debate.model import ArgumentModel
+
+    with make_event_sink(arguments.sink, arguments.output) as event_sink:
+        model = ArgumentModel(
+            dataset_path=dataset_path, event_sink=event_sink, seed=arguments.seed
+        )
+        model.run(arguments.max_steps)
+    committed_item = model.committed_item
+    return (
+        None if committed_item is None else committed_item.get_name(),
+        model.steps,
+    )
+
+
+def main(argv=None):
+    """Entry point of python -m debate."""
+    arguments = parse_arguments(argv)
+    committed_item, steps = run(arguments)
+    if committed_item is None:
+        print(f"No commitment after {steps} steps")
+    else:
+        print(f"Committed to {committed_item} after {steps} steps")
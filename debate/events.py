@@ -0,0 +1,136 @@
+""" Event sinks receiving what happens during a debate """
+
+import json
+
+
+class EventSink:
+    """EventSink class .
+    Receives the events of a debate: step boundaries, messages sent and delivered and
+    commitments. This base sink ignores every event; as it is disabled, the model does
+    not even call it.
+
+    attr :
+    enabled : whether the model should send events to the sink
+    """
+
+    enabled = False
+
+    def step_started(self, step):
+        """Called when a step of the debate starts ."""
+
+    def message_sent(self, message):
+        """Called when a message is sent ."""
+
+    def message_delivered(self, message):
+        """Called when a message is handled by its receiver ."""
+
+    def commitment_reached(self, item):
+        """Called when both agents committed to an item ."""
+
+    def close(self):
+        """Flush and release the resources of the sink ."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class NullEventSink(EventSink):
+    """NullEventSink class .
+    Sink discarding every event, for silent batch runs .
+    """
+
+
+class ConsoleEventSink(EventSink):
+    """ConsoleEventSink class .
+    Prints the debate in a human-readable form .
+    """
+
+    enabled = True
+
+    def step_started(self, step):
+        print(f"Step {step}:")
+
+    def message_delivered(self, message):
+        print(f"Message from {message.get_exp()}: {message.get_performative()}")
+        content = message.get_content()
+        if isinstance(content, list):
+            for element in content:
+                print(element)
+        else:
+            print(content)
+        print("")
+
+    def commitment_reached(self, item):
+        print(f"Commitment reached for {item} !\n")
+
+
+class JsonLinesEventSink(EventSink):
+    """JsonLinesEventSink class .
+    Writes one JSON object per event to a file, in batches of buffer_size events .
+
+    attr :
+    file : the file the events are written to
+    buffer : the events not written yet
+    step : the current step of the debate
+    """
+
+    enabled = True
+
+    def __init__(self, path, buffer_size=10000):
+        """Creates a new JSON lines sink writing to the given path ."""
+        self.file = open(path, "w", encoding="utf-8")
+        self.buffer = []
+        self.buffer_size = buffer_size
+        self.step = None
+
+    def step_started(self, step):
+        self.step = step
+        self.__add({"event": "step_started", "step": step})
+
+    def message_sent(self, message):
+        self.__add(self.__message_event("message_sent", message))
+
+    def message_delivered(self, message):
+        self.__add(self.__message_event("message_delivered", message))
+
+    def commitment_reached(self, item):
+        self.__add(
+            {"event": "commitment_reached", "step": self.step, "item": str(item)}
+        )
+
+    def flush(self):
+        """Writes the buffered events to the file ."""
+        if self.buffer:
+            self.file.write("".join(self.buffer))
+            self.buffer.clear()
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __message_event(self, event, message):
+        """Returns the JSON object describing a message event ."""
+        content = message.get_content()
+        return {
+            "event": event,
+            "step": self.step,
+            "from": message.get_exp(),
+            "to": message.get_dest(),
+            "performative": str(message.get_performative()),
+            "content": (
+                [str(element) for element in content]
+                if isinstance(content, list)
+                else str(content)
+            ),
+        }
+
+    def __add(self, event):
+        """Buffers an event and writes the buffer if it is full ."""
+        self.buffer.append(json.dumps(event) + "\n")
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
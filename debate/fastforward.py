@@ -0,0 +1,241 @@
+""" Fast-forward execution of two-agent debates, without messages nor scheduler"""
+
+import random
+
+import numpy as np
+
+from communication.message.MessagePerformative import MessagePerformative
+from communication.preferences.DatasetLoader import DATASET_PATH, load_dataset
+from communication.preferences.Preferences import Preferences
+from debate.events import EventSink
+from debate.sweep import TOP_PERCENT, get_first_better_items, get_ranks
+
+PERFORMATIVES = list(MessagePerformative)
+PROPOSE, ACCEPT, COMMIT, ASK_WHY, ARGUE = (
+    PERFORMATIVES.index(performative)
+    for performative in (
+        MessagePerformative.PROPOSE,
+        MessagePerformative.ACCEPT,
+        MessagePerformative.COMMIT,
+        MessagePerformative.ASK_WHY,
+        MessagePerformative.ARGUE,
+    )
+)
+AGENT_NAMES = ("A", "B")
+
+
+class FastForwardDebate:
+    """FastForwardDebate class .
+    Plays the debates of ArgumentModel between two agents directly from tables
+    derived from the preferences (top 10 percent items, premises, counter proposals),
+    without Message objects, mailboxes nor scheduler .
+
+    The random generator is drawn exactly as in ArgumentModel (initial proposal,
+    random activation of the agents at each step, premises and random counter
+    proposals), so that a debate with the same seed has the same moves and outcome .
+
+    attr :
+    items : the items of the dataset
+    preferences : the preferences holding the dataset
+    profiles : the tables of each criterion ordering used so far
+    """
+
+    def __init__(self, dataset_path=DATASET_PATH):
+        """Creates a new engine for the debates over a dataset ."""
+        self.preferences = Preferences()
+        self.preferences.set_criterion_name_list([0, 1, 2, 3, 4, 5])
+        self.items = load_dataset(dataset_path, self.preferences)
+        value_matrix = self.preferences.get_value_matrix()
+        value_matrix.freeze()
+        self.profiles = {}
+        self.__rows = list(range(len(self.items)))
+
+    def get_profile(self, criterion_name_list):
+        """Returns the tables of an agent using a criterion ordering : whether each
+        item is acceptable, the columns of the premises for each item (in order of
+        importance, the most important column for an item without any value over 4,
+        as ArgumentModel.support_proposal), the column of the criterion ranked
+        before each column and, for each item and column, the most preferred better
+        item (-1 if there is none, as Preferences.get_first_better_item) ."""
+        ordering = tuple(criterion_name_list)
+        profile = self.profiles.get(ordering)
+        if profile is None:
+            value_matrix = self.preferences.get_value_matrix()
+            columns = [value_matrix.get_column(name) for name in ordering]
+            values = value_matrix.get_values()[:, columns]
+            ranks = get_ranks(self.preferences, np.array([ordering]))
+            acceptable = ranks[0] < int(len(self.items) * TOP_PERCENT / 100)
+            better_items = get_first_better_items(value_matrix.get_values(), ranks)
+            premises = [
+                tuple(columns[i] for i in np.flatnonzero(row > 4).tolist())
+                or (columns[0],)
+                for row in values
+            ]
+            previous_columns = [None] * len(value_matrix.get_criterion_names())
+            for previous, column in zip(columns, columns[1:]):
+                previous_columns[column] = previous
+            profile = (
+                acceptable.tolist(),
+                premises,
+                previous_columns,
+                better_items[0].tolist(),
+            )
+            self.profiles[ordering] = profile
+        return profile
+
+    def run(self, seed, max_steps=20, criterion_orderings=None, moves=None):
+        """Plays a debate and returns its outcome, as run_debate does .
+        : param seed : int - seed of the random generator
+        : param criterion_orderings : the criterion name lists of A and B, or "random"
+        (the order of the dataset for both agents if None)
+        : param moves : list - if given, (step, sender name, performative, item) is
+        appended for each message handled
+        : return : tuple - (seed, committed item name or None, number of steps,
+        number of messages for each MessagePerformative)
+        """
+        rng = random.Random(seed)
+        criterion_names = self.preferences.get_criterion_name_list()
+        if criterion_orderings is None:
+            criterion_orderings = [criterion_names, criterion_names]
+        elif criterion_orderings == "random":
+            criterion_orderings = [
+                rng.sample(criterion_names, len(criterion_names)) for _ in range(2)
+            ]
+        profiles = [self.get_profile(ordering) for ordering in criterion_orderings]
+        rows = self.__rows
+        choice = rng.choice
+        getrandbits = rng.getrandbits
+
+        # Messages waiting for each agent: (performative, item row, premise column)
+        queues = [[], [(PROPOSE, choice(rows), None)]]
+        order = [0, 1]
+        counts = [0] * len(PERFORMATIVES)
+        commits = 0
+        committed = None
+        steps = 0
+        for _ in range(max_steps):
+            if committed is not None:
+                break
+            steps += 1
+            # rng.shuffle(order) of the random activation, inlined for two agents
+            bit = getrandbits(2)
+            while bit >= 2:
+                bit = getrandbits(2)
+            if bit == 0:
+                order.reverse()
+            for agent in order:
+                messages = queues[agent]
+                if not messages:
+                    continue
+                queues[agent] = []
+                answers = queues[1 - agent]
+                acceptable, premises, previous_columns, better_items = profiles[agent]
+                for performative, item, column in messages:
+                    counts[performative] += 1
+                    if moves is not None:
+                        moves.append(
+                            (
+                                steps - 1,
+                                AGENT_NAMES[1 - agent],
+                                PERFORMATIVES[performative],
+                                self.items[item],
+                            )
+                        )
+                    if performative == PROPOSE:
+                        if acceptable[item]:
+                            answers.append((ACCEPT, item, None))
+                        else:
+                            answers.append((ASK_WHY, item, None))
+                    elif performative == ACCEPT:
+                        answers.append((COMMIT, item, None))
+                        commits += 1
+                    elif performative == COMMIT:
+                        if commits == 1:
+                            answers.append((COMMIT, item, None))
+                            commits += 1
+                        elif commits == 2:
+                            committed = item
+                    elif performative == ASK_WHY:
+                        answers.append((ARGUE, item, choice(premises[item])))
+                    elif acceptable[item]:
+                        answers.append((ACCEPT, item, None))
+                    else:
+                        # Counter proposal: better item on the criterion, else on the
+                        # criterion ranked before it, else a random item
+                        counter_item = better_items[item][column]
+                        if counter_item >= 0:
+                            answers.append((ARGUE, counter_item, column))
+                            continue
+                        previous = previous_columns[column]
+                        if previous is not None:
+                            counter_item = better_items[item][previous]
+                            if counter_item >= 0:
+                                answers.append((ARGUE, counter_item, previous))
+                                continue
+                        counter_item = choice(rows)
+                        answers.append(
+                            (ARGUE, counter_item, choice(premises[counter_item]))
+                        )
+        return (
+            seed,
+            None if committed is None else self.items[committed].get_name(),
+            steps,
+            tuple(counts),
+        )
+
+
+class _MoveRecorder(EventSink):
+    """Event sink recording the messages handled during a debate ."""
+
+    enabled = True
+
+    def __init__(self):
+        self.moves = []
+        self.step = None
+
+    def step_started(self, step):
+        self.step = step
+
+    def message_delivered(self, message):
+        content = message.get_content()
+        item = content[1] if isinstance(content, list) else content
+        self.moves.append(
+            (self.step, message.get_exp(), message.get_performative(), item)
+        )
+
+
+def check_consistency(
+    seeds,
+    max_steps=20,
+    criterion_orderings=None,
+    dataset_path=DATASET_PATH,
+    engine=None,
+):
+    """Plays the debates of the given seeds both fast-forward and with ArgumentModel,
+    and returns the seeds whose moves or outcomes differ (an empty list if the
+    engine is consistent with the full simulation)."""
+    from debate.model import ArgumentModel
+
+    engine = FastForwardDebate(dataset_path) if engine is None else engine
+    mismatches = []
+    for seed in seeds:
+        moves = []
+        outcome = engine.run(seed, max_steps, criterion_orderings, moves)
+        recorder = _MoveRecorder()
+        model = ArgumentModel(
+            dataset_path=dataset_path,
+            event_sink=recorder,
+            seed=seed,
+            criterion_orderings=criterion_orderings,
+        )
+        model.run(max_steps)
+        committed_item = model.committed_item
+        simulated = (
+            seed,
+            None if committed_item is None else committed_item.get_name(),
+            model.steps,
+            tuple(model.message_counts[performative] for performative in PERFORMATIVES),
+        )
+        if moves != recorder.moves or outcome != simulated:
+            mismatches.append(seed)
+    return mismatches
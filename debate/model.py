@@ -0,0 +1,491 @@
+""" This file contains the code for the argumentation model. """
+
+import asyncio
+import copy
+from collections import Counter
+from time import perf_counter
+
+from mesa import Model
+from mesa.time import RandomActivation
+
+from communication.agent.CommunicatingAgent import CommunicatingAgent
+from communication.agent.MessageActivation import MessageActivation
+from communication.mailbox.AsyncMailbox import AsyncMailbox
+from communication.message.AsyncMessageService import AsyncMessageService
+from communication.message.MessageService import MessageService
+from communication.message.Message import Message
+from communication.message.MessagePerformative import MessagePerformative
+
+from communication.preferences.Preferences import Preferences
+from communication.preferences.Item import Item
+from communication.preferences.DatasetLoader import DATASET_PATH, load_dataset
+from arguments.couplevalue import CoupleValue
+
+from arguments.argument import Argument
+from debate.events import ConsoleEventSink
+
+PROFILED_HELPERS = ("support_proposal", "counter_proposal", "is_item_acceptable")
+
+
+class ArgumentAgent(CommunicatingAgent):
+    """ArgumentAgent which inherit from CommunicatingAgent .
+
+    attr :
+    preferences : the preferences of the agent
+    pair : the index of the debate the agent takes part in
+    """
+
+    def __init__(self, unique_id, model, name, preferences, mailbox=None, pair=0):
+        super().__init__(unique_id, model, name, mailbox)
+        self.preferences = preferences
+        self.pair = pair
+
+    def step(self):
+        """Handle the new messages of the agent and send the answers."""
+        for message in self.get_new_messages():
+            self.model.handle_message(message)
+
+
+class ArgumentModel(Model):
+    """ArgumentModel which inherit from Model .
+
+    Random choices are drawn from the model random generator, seeded with the `seed`
+    keyword argument.
+
+    The events of the debate (steps, messages, commitment) are sent to the event sink,
+    printing them on the console by default.
+
+    The model holds n_agents agents debating in pairs (A and B when there are only two
+    agents, A0 and B0, A1 and B1, ... otherwise). Every agent reads the same read-only
+    item x criterion matrix and only carries its own criterion ordering, taken from
+    criterion_orderings (one criterion name list per agent, or "random" to shuffle the
+    criteria for each agent); by default every agent uses the order of the dataset.
+    The debate stops once every pair has committed to an item. The matrix is read
+    from dataset_path, unless an already loaded value_matrix is given (e.g. to run
+    many debates over the same dataset without reading it again).
+
+    With the "random" activation, every agent is activated at each step, in a random
+    order. With the "message" activation, only the agents which received messages are
+    activated, in order of creation, so that the cost of a step depends on the number
+    of active agents rather than on the size of the population.
+
+    If a DebateProfiler is given, the model records the time spent in each phase of a
+    step, in each performative handler and in the argumentation helpers.
+
+    The debate is either run step by step (run, step) or, if the model is
+    asynchronous, as one coroutine per agent reacting to its messages (arun), so
+    that many debates can be interleaved on one event loop.
+    """
+
+    def __init__(
+        self,
+        dataset_path=DATASET_PATH,
+        event_sink=None,
+        asynchronous=False,
+        profiler=None,
+        seed=None,
+        n_agents=2,
+        criterion_orderings=None,
+        activation="random",
+        value_matrix=None,
+    ):
+        super().__init__()
+        if activation == "random":
+            self.schedule = RandomActivation(self)
+        elif activation == "message":
+            self.schedule = MessageActivation(self)
+        else:
+            raise ValueError(f"Unknown activation {activation!r}")
+        if asynchronous:
+            self.__messages_service = AsyncMessageService(self.schedule)
+        else:
+            self.__messages_service = MessageService(self.schedule)
+        self.event_sink = ConsoleEventSink() if event_sink is None else event_sink
+        # Events are only built for enabled sinks
+        self.__events = self.event_sink if self.event_sink.enabled else None
+        self.__pending_messages = 0
+        self.__handled_messages = 0
+
+        self.__profiler = profiler
+        self.__install_handlers()
+
+        if n_agents < 2 or n_agents % 2 != 0:
+            raise ValueError("The number of agents must be a positive even number")
+        self.preferences = Preferences(value_matrix)
+        self.commits = Counter()
+        self.steps = 0
+        self.committed_item = None
+        self.committed_items = {}
+        self.message_counts = Counter()
+
+        self.preferences.set_criterion_name_list([0, 1, 2, 3, 4, 5])
+
+        # Read the dataset, shared by the preferences of every agent
+        if value_matrix is None:
+            self.items = load_dataset(dataset_path, self.preferences)
+            value_matrix = self.preferences.get_value_matrix()
+        else:
+            self.items = value_matrix.get_items()
+        value_matrix.freeze()
+
+        if criterion_orderings == "random":
+            criterion_names = self.preferences.get_criterion_name_list()
+            criterion_orderings = [
+                self.random.sample(criterion_names, len(criterion_names))
+                for _ in range(n_agents)
+            ]
+        elif criterion_orderings is not None and len(criterion_orderings) != n_agents:
+            raise ValueError("There must be one criterion ordering per agent")
+
+        # Create agents, the agents with the same ordering sharing their preferences
+        self.__agents = {}
+        preferences_by_ordering = {}
+        for i in range(n_agents):
+            pair, role = divmod(i, 2)
+            name = "AB"[role] if n_agents == 2 else f"{'AB'[role]}{pair}"
+            if criterion_orderings is None:
+                preferences = self.preferences
+            else:
+                ordering = tuple(criterion_orderings[i])
+                preferences = preferences_by_ordering.get(ordering)
+                if preferences is None:
+                    preferences = Preferences(value_matrix)
+                    preferences.set_criterion_name_list(list(ordering))
+                    preferences_by_ordering[ordering] = preferences
+            agent = ArgumentAgent(
+                i + 1,
+                self,
+                name,
+                preferences,
+                AsyncMailbox() if asynchronous else None,
+                pair,
+            )
+            self.schedule.add(agent)
+            self.__agents[name] = agent
+        self.__n_pairs = n_agents // 2
+
+        self.running = True
+        agents = list(self.__agents)
+        for pair in range(self.__n_pairs):
+            self.__send_message(
+                Message(
+                    agents[2 * pair],
+                    agents[2 * pair + 1],
+                    MessagePerformative.PROPOSE,
+                    self.random.choice(self.items),
+                )
+            )
+
+    def __install_handlers(self):
+        """Bind the performative handlers (and the profiled helpers) to the model."""
+        self.__handlers = {
+            MessagePerformative.PROPOSE: self.__handle_propose,
+            MessagePerformative.ACCEPT: self.__handle_accept,
+            MessagePerformative.COMMIT: self.__handle_commit,
+            MessagePerformative.ASK_WHY: self.__handle_ask_why,
+            MessagePerformative.ARGUE: self.__handle_argue,
+        }
+        profiler = self.__profiler
+        if profiler is not None:
+            # Profiled versions of the handlers and helpers shadow the methods
+            for performative, handler in self.__handlers.items():
+                self.__handlers[performative] = profiler.wrap(
+                    f"handler.{performative}", handler
+                )
+            for helper in PROFILED_HELPERS:
+                self.__dict__.pop(helper, None)
+                setattr(
+                    self,
+                    helper,
+                    profiler.wrap(f"helper.{helper}", getattr(self, helper)),
+                )
+
+    def fork(self):
+        """Return an independent copy of the model in its current state (agents,
+        mailboxes, pending messages, commitments and random generator), to explore
+        another continuation of the debate.
+
+        The copy shares the event sink, the profiler and the items with the model, and
+        the preferences copy-on-write, so that forking costs about the size of the
+        mailboxes, not of the catalog. Asynchronous models cannot be forked.
+        """
+        return self.__copy_state(self, None)
+
+    def snapshot(self):
+        """Return a snapshot of the current state of the model, which can be restored
+        (several times) with restore() or forked."""
+        return self.fork()
+
+    def restore(self, snapshot):
+        """Set the model back to the state of a snapshot taken with snapshot()."""
+        self.__copy_state(snapshot, self)
+
+    @staticmethod
+    def __copy_state(model, target):
+        """Deep copy a model, into target if given (a new model otherwise)."""
+        if isinstance(model.__messages_service, AsyncMessageService):
+            raise ValueError("Asynchronous models cannot be copied")
+        memo = {id(model.event_sink): model.event_sink, id(model.items): model.items}
+        if model.__profiler is not None:
+            memo[id(model.__profiler)] = model.__profiler
+        if target is None:
+            target = copy.deepcopy(model, memo)
+        else:
+            memo[id(model)] = target
+            state = copy.deepcopy(model.__dict__, memo)
+            target.__dict__.clear()
+            target.__dict__.update(state)
+        target.__install_handlers()
+        return target
+
+    def get_agent(self, name):
+        """Return the agent with the given name."""
+        return self.__agents[name]
+
+    def support_proposal(self, item, preferences=None):
+        """
+        Used when the agent receives " ASK_WHY " after having proposed an item
+        (an item without any value over 4 is supported by its value on the most
+        important criterion)
+        : param item : str - name of the item which was proposed
+        : param preferences : Preferences - preferences of the agent (the ones of the
+        model if None)
+        : return : string - the strongest supportive argument
+        """
+        preferences = self.preferences if preferences is None else preferences
+        argument = Argument(True, item)
+        premisses = argument.list_supporting_proposal(item, preferences)
+        if not premisses:
+            # No value over 4: argue with the value of the most important criterion
+            criterion = preferences.get_criterion_name_list()[0]
+            premisses = [CoupleValue(criterion, preferences.get_value(item, criterion))]
+        return ["Because", item, self.random.choice(premisses)]
+
+    def counter_proposal(
+        self, proposed_item: Item, couple_value: CoupleValue, preferences=None
+    ):
+        """
+        Find a counter proposal to the given item, according to the given preferences
+        (the ones of the model if None)
+        - Try to find an item with a better value for the given criterion (the most
+          preferred one, as the first of the items sorted by preference)
+        - If not, consider a better criterion
+        - If not, propose a random item
+        """
+        preferences = self.preferences if preferences is None else preferences
+        criterion = couple_value.criterion_name
+        value = couple_value.value
+
+        # Find an item with a better value for the given criterion
+        item = preferences.get_first_better_item(criterion, value)
+        if item is not None:
+            return [
+                "Found better item for this criterion",
+                item,
+                CoupleValue(criterion, preferences.get_value(item, criterion)),
+            ]
+
+        # Consider a better criterion
+        best_criterion = None
+        for criterion in preferences.get_criterion_name_list():
+            if criterion != couple_value.criterion_name:
+                best_criterion = criterion
+            else:
+                break
+        # Find an item with a better value for the best criterion
+        if best_criterion is not None:
+            best_criterion_value = preferences.get_value(proposed_item, best_criterion)
+            item = preferences.get_first_better_item(
+                best_criterion, best_criterion_value
+            )
+            if item is not None:
+                return [
+                    "The criterion is not the most important one",
+                    item,
+                    CoupleValue(
+                        best_criterion, preferences.get_value(item, best_criterion)
+                    ),
+                ]
+
+        # Else random item
+        item = self.random.choice(self.items)
+        return [
+            "The item is not satisfying, how about...",
+            item,
+            self.support_proposal(item, preferences)[2],
+        ]
+
+    def __send_message(self, message):
+        """Send a message through the message service of the model."""
+        self.__pending_messages += 1
+        if self.__events is not None:
+            self.__events.message_sent(message)
+        self.__messages_service.send_message(message)
+
+    def run(self, max_steps):
+        """Run the debate until a commitment is reached or for at most max_steps steps."""
+        for _ in range(max_steps):
+            if not self.running:
+                break
+            self.step()
+
+    async def arun(self, max_messages):
+        """Run an asynchronous debate until a commitment is reached, no message is left
+        or max_messages messages have been handled. An exception raised while handling
+        a message stops the debate and is raised again."""
+        self.__handled_messages = 0
+        finished = asyncio.Event()
+        waiter = asyncio.ensure_future(finished.wait())
+        tasks = [asyncio.ensure_future(self.__messages_service.deliver_messages())]
+        tasks.extend(
+            asyncio.ensure_future(self.__react(agent, max_messages, finished))
+            for agent in self.schedule.agents
+        )
+        try:
+            done, _ = await asyncio.wait(
+                [waiter, *tasks], return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in [waiter, *tasks]:
+                task.cancel()
+            await asyncio.gather(waiter, *tasks, return_exceptions=True)
+        for task in tasks:
+            if task in done and task.exception() is not None:
+                raise task.exception()
+
+    async def __react(self, agent, max_messages, finished):
+        """Coroutine of an agent: handle its messages as they arrive."""
+        while True:
+            for message in await agent.wait_new_messages():
+                self.handle_message(message)
+                self.__handled_messages += 1
+                if (
+                    not self.running
+                    or self.__pending_messages == 0
+                    or self.__handled_messages >= max_messages
+                ):
+                    finished.set()
+                    return
+
+    def step(self):
+        if self.__events is not None:
+            self.__events.step_started(self.steps)
+        self.steps += 1
+        if self.__profiler is not None:
+            self.__profiled_step()
+            return
+        self.__messages_service.dispatch_messages()
+        self.schedule.step()
+
+    def __profiled_step(self):
+        """Step of the model, timing each of its phases."""
+        profiler = self.__profiler
+        start = perf_counter()
+        self.__messages_service.dispatch_messages()
+        dispatched = perf_counter()
+        self.schedule.step()
+        stepped = perf_counter()
+        profiler.add("phase.dispatch", dispatched - start)
+        profiler.add("phase.schedule_step", stepped - dispatched)
+
+    def is_item_acceptable(self, item, preferences=None):
+        """Return whether an item is good enough to be accepted (top 10% of the items
+        according to the given preferences, the ones of the model if None)."""
+        preferences = self.preferences if preferences is None else preferences
+        return preferences.is_item_among_top_10_percent(item)
+
+    def handle_message(self, message):
+        """Handle a message received by an agent and send the answer."""
+        performative = message.get_performative()
+        self.message_counts[performative] += 1
+        self.__pending_messages -= 1
+
+        if self.__events is not None:
+            self.__events.message_delivered(message)
+
+        handler = self.__handlers.get(performative)
+        if handler is not None:
+            handler(message)
+
+    def __handle_propose(self, message):
+        """If PROPOSE, send ACCEPT or ASK_WHY."""
+        content = message.get_content()
+        preferences = self.__agents[message.get_dest()].preferences
+        if self.is_item_acceptable(content, preferences):
+            performative = MessagePerformative.ACCEPT
+        else:
+            performative = MessagePerformative.ASK_WHY
+        self.__send_message(
+            Message(message.get_dest(), message.get_exp(), performative, content)
+        )
+
+    def __handle_accept(self, message):
+        """If ACCEPT, send COMMIT."""
+        self.__send_message(
+            Message(
+                message.get_dest(),
+                message.get_exp(),
+                MessagePerformative.COMMIT,
+                message.get_content(),
+            )
+        )
+        self.commits[self.__agents[message.get_dest()].pair] += 1
+
+    def __handle_commit(self, message):
+        """If COMMIT, send COMMIT and stop the simulation."""
+        content = message.get_content()
+        pair = self.__agents[message.get_dest()].pair
+        if self.commits[pair] == 1:
+            self.__send_message(
+                Message(
+                    message.get_dest(),
+                    message.get_exp(),
+                    MessagePerformative.COMMIT,
+                    content,
+                )
+            )
+            self.commits[pair] += 1
+        elif self.commits[pair] == 2:
+            if self.__events is not None:
+                self.__events.commitment_reached(content)
+            self.committed_item = content
+            self.committed_items[pair] = content
+            if len(self.committed_items) == self.__n_pairs:
+                self.running = False
+
+    def __handle_ask_why(self, message):
+        """If ASK_WHY, send ARGUE."""
+        self.__send_message(
+            Message(
+                message.get_dest(),
+                message.get_exp(),
+                MessagePerformative.ARGUE,
+                self.support_proposal(
+                    message.get_content(),
+                    self.__agents[message.get_dest()].preferences,
+                ),
+            )
+        )
+
+    def __handle_argue(self, message):
+        """If ARGUE, send ACCEPT or ARGUE."""
+        [_, item, couple_value] = message.get_content()
+        preferences = self.__agents[message.get_dest()].preferences
+        if self.is_item_acceptable(item, preferences):
+            self.__send_message(
+                Message(
+                    message.get_dest(),
+                    message.get_exp(),
+                    MessagePerformative.ACCEPT,
+                    item,
+                )
+            )
+        else:
+            self.__send_message(
+                Message(
+                    message.get_dest(),
+                    message.get_exp(),
+                    MessagePerformative.ARGUE,
+                    self.counter_proposal(item, couple_value, preferences),
+                )
+            )
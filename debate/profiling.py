@@ -0,0 +1,69 @@
+""" Opt-in profiling of the debate loop """
+
+import sys
+from functools import wraps
+from time import perf_counter
+
+
+class DebateProfiler:
+    """DebateProfiler class .
+    Records the number of calls and the wall time of named sections of the debate
+    loop (phases of a step, performative handlers, argumentation helpers) .
+
+    attr :
+    calls : number of calls of each section
+    times : total wall time of each section, in seconds
+    """
+
+    def __init__(self):
+        """Creates a new empty profiler ."""
+        self.calls = {}
+        self.times = {}
+
+    def add(self, name, seconds):
+        """Records a call of a section which lasted the given time ."""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+    def wrap(self, name, function):
+        """Returns function, recording each of its calls under the given name ."""
+
+        @wraps(function)
+        def profiled(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(name, perf_counter() - start)
+
+        return profiled
+
+    def get_stats(self):
+        """Returns the statistics of each section, the most time consuming first :
+        a list of (name, calls, total seconds, mean seconds) ."""
+        return sorted(
+            (
+                (name, self.calls[name], total, total / self.calls[name])
+                for name, total in self.times.items()
+            ),
+            key=lambda stat: stat[2],
+            reverse=True,
+        )
+
+    def reset(self):
+        """Forgets all the recorded calls ."""
+        self.calls.clear()
+        self.times.clear()
+
+    def dump(self, file=None):
+        """Prints the statistics of each section ."""
+        file = sys.stdout if file is None else file
+        print(
+            f"{'section':<32}{'calls':>10}{'total (ms)':>14}{'mean (us)':>14}",
+            file=file,
+        )
+        for name, calls, total, mean in self.get_stats():
+            print(
+                f"{name:<32}{calls:>10}{total * 1e3:>14.3f}{mean * 1e6:>14.2f}",
+                file=file,
+            )
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Testing the functionalities of the debate package.
+"""
+
+import asyncio
+import gc
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from arguments.argument import Argument
+from arguments.framework import ArgumentationFramework
+from communication.preferences.CatalogGenerator import DISTRIBUTIONS, write_catalog
+from communication.preferences.DatasetLoader import DATASET_PATH, load_dataset
+from communication.preferences.Item import Item
+from communication.preferences.Preferences import Preferences
+from debate.batch import _run_debates, run_batch
+from debate.cli import parse_arguments, run
+from debate.events import NullEventSink
+from debate.fastforward import FastForwardDebate, check_consistency
+from debate.model import ArgumentModel
+from debate.sweep import sweep_pairs
+
+
+def raise_error(message):
+    """Message handler failing on the first message."""
+    raise KeyError(message.get_performative())
+
+
+class SkippingDebate(FastForwardDebate):
+    """Fast-forward engine dropping the last step of the debates of odd seeds."""
+
+    def run(self, seed, max_steps=20, criterion_orderings=None, moves=None):
+        outcome = super().run(seed, max_steps, criterion_orderings, moves)
+        if seed % 2 == 0:
+            return outcome
+        return outcome[:2] + (outcome[2] - 1,) + outcome[3:]
+
+
+def get_preferred_better_item(preferences, criterion_name, value):
+    """Return the most preferred item among the items better than a value on a
+    criterion, or None (what Preferences.get_first_better_item returns)."""
+    return min(
+        preferences.get_items_better_than(criterion_name, value),
+        key=preferences.get_rank,
+        default=None,
+    )
+
+
+def get_outcome(model):
+    """Return the state of a debate: its commitment, steps, message counts and the
+    contents of the mailboxes of the agents."""
+    committed_item = model.committed_item
+    return (
+        None if committed_item is None else committed_item.get_name(),
+        model.steps,
+        dict(model.message_counts),
+        [
+            [message.get_content() for message in agent.get_messages()]
+            for agent in (model.get_agent("A"), model.get_agent("B"))
+        ],
+    )
+
+
+def predict_pair(preferences_a, preferences_b, items):
+    """Return the probabilities that B accepts the first proposal of A and that A
+    accepts the first counter proposal of B, item by item from the ranks of the
+    items in the preferences of the agents."""
+    top_a = [preferences_a.is_item_among_top_10_percent(item) for item in items]
+    top_b = [preferences_b.is_item_among_top_10_percent(item) for item in items]
+    rows = {item: row for row, item in enumerate(items)}
+    criterion_names = preferences_b.get_criterion_name_list()
+    refused = [item for item, top in zip(items, top_b) if not top]
+    accept_second = 0
+    for item in refused:
+        premises = [
+            premise.criterion_name for premise in preferences_a.get_premises(item)[0]
+        ]
+        premises = premises or preferences_a.get_criterion_name_list()[:1]
+        for criterion in premises:
+            counter_item = get_preferred_better_item(
+                preferences_b, criterion, preferences_b.get_value(item, criterion)
+            )
+            position = criterion_names.index(criterion)
+            if counter_item is None and position > 0:
+                previous = criterion_names[position - 1]
+                counter_item = get_preferred_better_item(
+                    preferences_b, previous, preferences_b.get_value(item, previous)
+                )
+            if counter_item is None:
+                accept_second += np.mean(top_a) / len(premises)
+            else:
+                accept_second += top_a[rows[counter_item]] / len(premises)
+    return np.mean(top_b), accept_second / len(refused)
+
+
+if __name__ == "__main__":
+    print("*---- Testing debate package ----")
+    print("*")
+    print("* 1) Testing asynchronous debates")
+
+    model = ArgumentModel(asynchronous=True, event_sink=NullEventSink(), seed=1)
+    asyncio.run(asyncio.wait_for(model.arun(100), 10))
+    assert not model.running
+    assert model.committed_item is not None
+    print("*     arun() until a commitment => OK")
+
+    model = ArgumentModel(asynchronous=True, event_sink=NullEventSink(), seed=1)
+    model.handle_message = raise_error
+    try:
+        asyncio.run(asyncio.wait_for(model.arun(100), 10))
+        assert False
+    except KeyError:
+        pass
+    print("*     arun() raises the errors of the agents => OK")
+
+    print("* 2) Testing debates on generated catalogs")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for distribution in DISTRIBUTIONS:
+            path = os.path.join(directory, distribution + ".csv")
+            write_catalog(path, 2000, distribution=distribution)
+            # The documented workflow: python -m debate --dataset catalog.csv
+            for seed in range(100):
+                arguments = ["--dataset", path, "--seed", str(seed), "--sink", "null"]
+                run(parse_arguments(arguments))
+            outcomes = run_batch(200, dataset_path=path, processes=0)
+            assert outcomes["error"].isna().all()
+            fast_outcomes = run_batch(
+                5000, dataset_path=path, processes=0, fast_forward=True
+            )
+            assert fast_outcomes["error"].isna().all()
+            assert outcomes.astype(str).equals(fast_outcomes[:200].astype(str))
+            print("*     " + distribution + " catalog => OK")
+
+    print("* 3) Testing argumentation frameworks")
+
+    framework = ArgumentationFramework.from_attacks("abc", [(0, 1), (1, 2)])
+    assert framework.attacks(0, 1) and not framework.attacks(1, 0)
+    assert framework.get_attackers(2) == [1]
+    assert framework.get_grounded_extension() == ["a", "c"]
+    assert framework.get_preferred_extensions() == [["a", "c"]]
+    framework = ArgumentationFramework.from_attacks("ab", [(0, 1), (1, 0)])
+    assert framework.get_grounded_extension() == []
+    assert framework.get_preferred_extensions() == [["a"], ["b"]]
+    framework = ArgumentationFramework.from_attacks("abc", [(0, 1), (1, 2), (2, 0)])
+    assert framework.get_grounded_extension() == []
+    assert framework.get_preferred_extensions() == [[]]
+    # A chain of arguments over several 64 bit words
+    framework = ArgumentationFramework.from_attacks(
+        list(range(130)), [(i, i + 1) for i in range(129)]
+    )
+    assert framework.get_grounded_extension() == list(range(0, 130, 2))
+    print("*     extensions of a framework => OK")
+
+    item_x = Item("X", "")
+    item_y = Item("Y", "")
+    item_z = Item("Z", "")
+    preferences = Preferences()
+    preferences.set_criterion_name_list([0, 1])
+    arguments = [Argument(True, item_x), Argument(False, item_x)]
+    arguments += [Argument(True, item_y), Argument(True, item_z)]
+    arguments[0].add_premiss_couple_values(0, 8)
+    arguments[1].add_premiss_couple_values(1, 9)
+    arguments[2].add_premiss_couple_values(0, 6)
+    framework = ArgumentationFramework.from_arguments(arguments, preferences)
+    assert [framework.get_attackers(i) for i in range(4)] == [[], [0], [0], [0, 2]]
+    assert framework.get_grounded_extension() == [arguments[0]]
+    print("*     attacks between the arguments of a debate => OK")
+
+    print("* 4) Testing sweeps over the criterion orderings")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "skewed.csv")
+        write_catalog(path, 300, distribution="skewed", seed=3)
+        preferences = Preferences()
+        items = load_dataset(path, preferences)
+        orderings = np.array(
+            [[0, 1, 2, 3, 4, 5], [5, 4, 3, 2, 1, 0], [2, 0, 5, 1, 3, 4]]
+        )
+        pairs = sweep_pairs(preferences, orderings, batch_size=2)
+        for pair in pairs.itertuples():
+            preferences_a = Preferences(preferences.get_value_matrix())
+            preferences_a.set_criterion_name_list(list(orderings[pair.ordering_a]))
+            preferences_b = Preferences(preferences.get_value_matrix())
+            preferences_b.set_criterion_name_list(list(orderings[pair.ordering_b]))
+            accept_first, accept_second = predict_pair(
+                preferences_a, preferences_b, items
+            )
+            assert np.isclose(pair.accept_first, accept_first)
+            assert np.isclose(pair.accept_second, accept_second)
+            assert np.isclose(
+                pair.commit_early, accept_first + (1 - accept_first) * accept_second
+            )
+        assert (pairs["no_premise"] > 0).all()
+        print("*     sweep_pairs() => OK")
+
+    print("* 5) Testing fast-forward debates")
+
+    assert check_consistency(range(50)) == []
+    assert check_consistency(range(50), criterion_orderings="random") == []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "skewed.csv")
+        write_catalog(path, 2000, distribution="skewed")
+        engine = FastForwardDebate(path)
+        assert check_consistency(range(50), dataset_path=path, engine=engine) == []
+        assert check_consistency(
+            range(6), dataset_path=path, engine=SkippingDebate(path)
+        ) == [1, 3, 5]
+    print("*     check_consistency() => OK")
+
+    print("* 6) Testing debates on the weapons dataset")
+
+    # Counter proposals are the most preferred better items: every debate commits
+    outcomes = run_batch(300, processes=0)
+    assert outcomes["committed_item"].notna().all()
+    assert outcomes["steps"].max() < 20
+    fast_outcomes = run_batch(300, processes=0, fast_forward=True)
+    assert outcomes.astype(str).equals(fast_outcomes.astype(str))
+    print("*     commitment rate => OK")
+
+    # The models of the debates are freed once played: the memory of a worker stays
+    # flat from a chunk of seeds to the next
+    tracemalloc.start()
+    traced_sizes = []
+    for chunk in range(5):
+        _run_debates(range(64 * chunk, 64 * chunk + 64), 20, DATASET_PATH)
+        gc.collect()
+        traced_sizes.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+    assert max(traced_sizes) - traced_sizes[0] < 256 * 1024
+    print("*     memory of the workers across chunks => OK")
+
+    print("* 7) Testing forks of a debate")
+
+    model = ArgumentModel(event_sink=NullEventSink(), seed=0)
+    model.run(3)
+    assert model.running
+    snapshot = model.snapshot()
+    fork = model.fork()
+    for copied_model in (snapshot, fork):
+        assert np.shares_memory(
+            copied_model.preferences.get_value_matrix().get_values(),
+            model.preferences.get_value_matrix().get_values(),
+        )
+        assert copied_model.get_agent("A") is not model.get_agent("A")
+    model.run(20)
+    fork.run(20)
+    assert not model.running
+    outcome = get_outcome(model)
+    assert get_outcome(fork) == outcome
+    print("*     fork() plays the same debate for the same random state => OK")
+
+    other_fork = snapshot.fork()
+    other_fork.random.seed(1)
+    other_fork.run(20)
+    assert get_outcome(other_fork) != outcome
+    assert get_outcome(model) == outcome and get_outcome(fork) == outcome
+    assert snapshot.steps == 3 and snapshot.running
+    print("*     forks are independent => OK")
+
+    for _ in range(2):
+        model.restore(snapshot)
+        assert model.steps == 3 and model.running
+        model.run(20)
+        assert get_outcome(model) == outcome
+    print("*     restore() of a snapshot several times => OK")
+
+    print("* 8) Testing debates between many agents")
+
+    orderings = [[0, 1, 2, 3, 4, 5], [1, 0, 2, 3, 4, 5]] * 3
+    model = ArgumentModel(
+        event_sink=NullEventSink(), seed=2, n_agents=6, criterion_orderings=orderings
+    )
+    names = ["A0", "B0", "A1", "B1", "A2", "B2"]
+    assert [model.get_agent(name).get_name() for name in names] == names
+    assert [model.get_agent(name).pair for name in names] == [0, 0, 1, 1, 2, 2]
+    print("*     agents named after their pair => OK")
+
+    preferences_a = model.get_agent("A0").preferences
+    assert model.get_agent("A1").preferences is preferences_a
+    assert model.get_agent("A2").preferences is preferences_a
+    assert model.get_agent("B0").preferences is not preferences_a
+    assert model.get_agent("B2").preferences is model.get_agent("B1").preferences
+    assert preferences_a.get_criterion_name_list() == orderings[0]
+    print("*     agents with the same ordering share their preferences => OK")
+
+    # The debate goes on until every pair has committed
+    while model.running and model.steps < 100:
+        model.step()
+        assert model.running == (len(model.committed_items) < 3)
+    assert sorted(model.committed_items) == [0, 1, 2]
+    for pair, item in model.committed_items.items():
+        assert any(
+            model.is_item_acceptable(
+                item, model.get_agent(role + str(pair)).preferences
+            )
+            for role in "AB"
+        )
+    print("*     one commitment per pair => OK")
+
+    try:
+        ArgumentModel(
+            event_sink=NullEventSink(), n_agents=4, criterion_orderings=orderings
+        )
+        assert False
+    except ValueError:
+        pass
+    print("*     one criterion ordering per agent => OK")
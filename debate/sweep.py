@@ -0,0 +1,230 @@
+""" Sweeps over the criterion orderings of the agents, without running debates"""
+
+from itertools import permutations
+
+import numpy as np
+
+from communication.preferences.CriterionName import reverse_criterion_name_dict
+
+TOP_PERCENT = 10
+BATCH_CELLS = 2**22
+
+
+def all_orderings(criterion_names):
+    """Return every ordering of the criterion names, as a P x C array (P = C!)."""
+    return np.array(list(permutations(criterion_names)))
+
+
+def get_ranks(preferences, orderings):
+    """Return the P x N array of the ranks of the items for an agent using each
+    ordering (as Preferences.get_rank, 0 for the most preferred item)."""
+    scores = preferences.score_items(criterion_name_lists=orderings)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(scores.shape[1]), axis=1)
+    return ranks
+
+
+def get_top_masks(preferences, orderings):
+    """Return the P x N boolean array of the items among the top 10 percent of an
+    agent using each ordering (as Preferences.is_item_among_top_10_percent)."""
+    ranks = get_ranks(preferences, orderings)
+    return ranks < int(ranks.shape[1] * TOP_PERCENT / 100)
+
+
+def sweep_orderings(preferences, orderings=None):
+    """Return the top 10 percent items of the agents using each ordering.
+
+    : param orderings : P x C array of criterion name lists (all the orderings of the
+    criteria of the preferences if None)
+    : return : tuple - (DataFrame with one row per ordering: its name, its most
+    preferred item and its number of top items ; P x ceil(N / 8) array of the top
+    items of each ordering, as bits packed by numpy.packbits)
+    """
+    import pandas as pd
+
+    value_matrix = preferences.get_value_matrix()
+    if orderings is None:
+        orderings = all_orderings(value_matrix.get_criterion_names())
+    items = value_matrix.get_items()
+    top_masks = get_top_masks(preferences, orderings)
+    scores = preferences.score_items(criterion_name_lists=orderings)
+    table = pd.DataFrame(
+        {
+            "ordering": [
+                " > ".join(
+                    reverse_criterion_name_dict.get(name, str(name))
+                    for name in ordering
+                )
+                for ordering in orderings.tolist()
+            ],
+            "best_item": pd.Categorical(
+                [items[row].get_name() for row in np.argmax(scores, axis=1)]
+            ),
+            "n_top": top_masks.sum(axis=1).astype(np.int32),
+        }
+    )
+    return table, np.packbits(top_masks, axis=1)
+
+
+def sweep_pairs(preferences, orderings=None, batch_size=None):
+    """Predict the start of the two-agent debates for every pair of orderings.
+
+    In a debate, A proposes a random item, which B accepts if it is among its top 10
+    percent. Otherwise A argues with a random premise for the item (its most important
+    criterion if the item has no value over 4), and B answers with a counter proposal:
+    the item B prefers among the items better on the criterion of the premise, else
+    among the items better on the criterion B ranks just before it, else a random
+    item. A accepts the counter
+    proposal if it is among its own top 10 percent.
+    These probabilities only depend on the orderings, and are computed for all the
+    pairs at once, in batches of batch_size orderings for B (by default, batches of
+    about BATCH_CELLS item x criterion cells).
+
+    : param orderings : P x C array of criterion name lists (all the orderings of the
+    criteria of the preferences if None)
+    : return : DataFrame - one row per (ordering of A, ordering of B) pair with the
+    indexes of both orderings, the probability that B accepts the first proposal,
+    that A accepts the first counter proposal (once B refused), that A has no premise
+    for its proposal (and argues with its most important criterion), that they commit
+    after one of these two acceptances, and the number of items in both top 10 percent
+    """
+    import pandas as pd
+
+    value_matrix = preferences.get_value_matrix()
+    if orderings is None:
+        orderings = all_orderings(value_matrix.get_criterion_names())
+    values = value_matrix.get_values()
+    n_items, n_criteria = values.shape
+    n_orderings = len(orderings)
+    columns = np.array(
+        [[value_matrix.get_column(name) for name in ordering] for ordering in orderings]
+    )
+    top_masks = get_top_masks(preferences, orderings)
+    if batch_size is None:
+        batch_size = max(1, BATCH_CELLS // max(1, n_items * n_criteria))
+
+    # Premises for an item: its criteria with a value over 4, chosen at random, else
+    # the most important criterion of A
+    pro = values > 4
+    n_pro = pro.sum(axis=1)
+    premise_weights = np.divide(
+        pro, n_pro[:, None], out=np.zeros(pro.shape), where=n_pro[:, None] > 0
+    )
+    first_columns = columns[:, 0]
+
+    # Column of the criterion ranked just before each column, in each ordering
+    previous_columns = np.full((n_orderings, n_criteria), -1)
+    np.put_along_axis(
+        previous_columns,
+        columns[:, 1:],
+        columns[:, :-1],
+        axis=1,
+    )
+
+    # Acceptance by A of each counter proposal (the last one being a random item)
+    acceptances = np.empty((n_orderings, n_items + 1))
+    acceptances[:, :n_items] = top_masks
+    acceptances[:, n_items] = top_masks.mean(axis=1)
+
+    refused = ~top_masks
+    accept_first = top_masks.mean(axis=1)
+    accept_second = np.empty((n_orderings, n_orderings))
+    no_premise = (refused & (n_pro == 0)).mean(axis=1)
+    for start in range(0, n_orderings, batch_size):
+        stop = min(start + batch_size, n_orderings)
+        # Counter proposals of B for each (ordering, item, criterion of the premise)
+        better_items = get_first_better_items(
+            values, get_ranks(preferences, orderings[start:stop])
+        )
+        previous = previous_columns[start:stop]
+        fallback = np.where(
+            previous[:, None, :] >= 0,
+            np.take_along_axis(
+                better_items,
+                np.broadcast_to(
+                    np.maximum(previous, 0)[:, None, :], better_items.shape
+                ),
+                axis=2,
+            ),
+            n_items,
+        )
+        fallback = np.where(fallback >= 0, fallback, n_items)
+        counter_items = np.where(better_items >= 0, better_items, fallback)
+        # Probability of each counter proposal, once B refused the first proposal
+        weights = premise_weights * refused[start:stop, :, None] / n_items
+        offsets = np.arange(stop - start)[:, None, None] * (n_items + 1)
+        counter_probabilities = np.bincount(
+            (counter_items + offsets).ravel(),
+            weights=weights.ravel(),
+            minlength=(stop - start) * (n_items + 1),
+        ).reshape(stop - start, n_items + 1)
+        accept_second[:, start:stop] = acceptances @ counter_probabilities.T
+        # Items without premise, argued on the first criterion of A
+        weights = (refused[start:stop] & (n_pro == 0)) / n_items
+        for column in np.unique(first_columns):
+            counter_probabilities = np.bincount(
+                (counter_items[:, :, column] + offsets[:, :, 0]).ravel(),
+                weights=weights.ravel(),
+                minlength=(stop - start) * (n_items + 1),
+            ).reshape(stop - start, n_items + 1)
+            rows = first_columns == column
+            accept_second[rows, start:stop] += (
+                acceptances[rows] @ counter_probabilities.T
+            )
+    n_refused = refused.mean(axis=1)
+    accept_second = np.divide(
+        accept_second,
+        n_refused[None, :],
+        out=np.zeros_like(accept_second),
+        where=n_refused[None, :] > 0,
+    )
+
+    n_common = top_masks.astype(np.int32) @ top_masks.T.astype(np.int32)
+    ordering_a, ordering_b = np.divmod(
+        np.arange(n_orderings * n_orderings), n_orderings
+    )
+    return pd.DataFrame(
+        {
+            "ordering_a": ordering_a.astype(np.int32),
+            "ordering_b": ordering_b.astype(np.int32),
+            "accept_first": accept_first[ordering_b].astype(np.float32),
+            "accept_second": accept_second.ravel().astype(np.float32),
+            "no_premise": no_premise[ordering_b].astype(np.float32),
+            "commit_early": (
+                accept_first[ordering_b] + n_refused[ordering_b] * accept_second.ravel()
+            ).astype(np.float32),
+            "n_common": n_common.ravel().astype(np.int32),
+        }
+    )
+
+
+def get_first_better_items(values, ranks):
+    """Return, for each agent, item and criterion, the item with the lowest rank for
+    the agent among the items with a greater value on this criterion, or -1 if there
+    is none (as Preferences.get_first_better_item).
+
+    : param values : N x C array of the values of the items
+    : param ranks : P x N array of the ranks of the items for each agent (as
+    get_ranks)
+    : return : P x N x C array of item rows
+    """
+    n_agents, n_items = ranks.shape
+    better_items = np.empty((n_agents, n_items, values.shape[1]), dtype=np.intp)
+    rows_by_rank = np.empty((n_agents, n_items + 1), dtype=np.intp)
+    np.put_along_axis(rows_by_rank, ranks, np.arange(n_items), axis=1)
+    rows_by_rank[:, n_items] = -1
+    for column in range(values.shape[1]):
+        order = np.argsort(values[:, column], kind="stable")
+        sorted_values = values[order, column]
+        # Lowest rank among the items from each position in the order of the values
+        suffix_min_ranks = np.empty((n_agents, n_items + 1), dtype=np.intp)
+        suffix_min_ranks[:, :n_items] = np.minimum.accumulate(
+            ranks[:, order[::-1]], axis=1
+        )[:, ::-1]
+        suffix_min_ranks[:, n_items] = n_items
+        starts = np.searchsorted(sorted_values, values[:, column], side="right")
+        better_items[:, :, column] = np.take_along_axis(
+            rows_by_rank, suffix_min_ranks[:, starts], axis=1
+        )
+    return better_items